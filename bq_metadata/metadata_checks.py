@@ -0,0 +1,81 @@
+"""
+Checks over a metadata snapshot (see metadata_snapshot.py). Each check is a vectorised filter
+on the snapshot DataFrame, so project-wide audits run locally in milliseconds.
+
+    snapshot = get_snapshot("evident-data-dev")
+    dataset_convention_fails(snapshot)
+    stale_tables(snapshot, dataset_id="raw_google_patents")
+"""
+import pandas as pd
+
+
+DATASET_CONVENTIONS = ('raw_', 'curated_', 'product_', 'temporary')
+TABLE_CONVENTIONS = ('insurance_', 'banking_', 'payments_')
+
+
+def tables_only(snapshot):
+    """Rows that are tables or views (drops the placeholder rows of empty datasets)."""
+    return snapshot[snapshot["table_id"].notna()]
+
+
+def dataset_convention_fails(snapshot, conventions=DATASET_CONVENTIONS):
+    datasets = pd.Series(snapshot["dataset_id"].unique())
+    return sorted(datasets[~datasets.str.startswith(conventions)])
+
+
+def table_convention_fails(snapshot, conventions=TABLE_CONVENTIONS):
+    """'dataset.table' names whose table name does not start with one of the conventions."""
+    tables = tables_only(snapshot)
+    fails = tables[~tables["table_id"].str.startswith(conventions)]
+    return (fails["dataset_id"] + "." + fails["table_id"]).tolist()
+
+
+def add_ages(snapshot, now=None):
+    now = now or pd.Timestamp.now(tz="UTC")
+    snapshot = snapshot.copy()
+    snapshot["days_since_created"] = (now - snapshot["created"]).dt.days
+    # views have no storage, so fall back to their creation time
+    snapshot["days_since_modified"] = (now - snapshot["modified"].fillna(snapshot["created"])).dt.days
+    return snapshot
+
+
+def stale_tables(snapshot, min_days=30, dataset_id=None, now=None):
+    """Tables created at least min_days ago, with their days since creation and last modification."""
+    tables = add_ages(tables_only(snapshot), now)
+    if dataset_id is not None:
+        tables = tables[tables["dataset_id"] == dataset_id]
+    stale = tables[tables["days_since_created"] >= min_days]
+    return stale[["dataset_id", "table_id", "table_type", "days_since_created", "days_since_modified"]]
+
+
+def unmodified_tables(snapshot, min_days=30, now=None):
+    """Tables not modified (data, schema or metadata, as Table.modified) for at least min_days."""
+    tables = add_ages(tables_only(snapshot), now)
+    tables = tables[(tables["table_type"] == "TABLE") & (tables["days_since_modified"] >= min_days)]
+    return tables.sort_values("days_since_modified", ascending=False)
+
+
+def empty_tables(snapshot):
+    tables = tables_only(snapshot)
+    return tables[(tables["table_type"] == "TABLE") & (tables["num_rows"].fillna(0) == 0)]
+
+
+def empty_datasets(snapshot):
+    return sorted(snapshot.loc[snapshot["table_id"].isna(), "dataset_id"])
+
+
+def largest_tables(snapshot, n=20):
+    tables = tables_only(snapshot)
+    largest = tables.sort_values("num_bytes", ascending=False).head(n).copy()
+    largest["size_gb"] = largest["num_bytes"].astype("float") / 1e9
+    return largest[["dataset_id", "table_id", "num_rows", "size_gb"]]
+
+
+def dataset_summary(snapshot):
+    """Per dataset: number of tables, rows, size and last modification."""
+    tables = tables_only(snapshot)
+    return tables.groupby("dataset_id").agg(tables=("table_id", "count"),
+                                            num_rows=("num_rows", "sum"),
+                                            num_bytes=("num_bytes", "sum"),
+                                            last_modified=("modified", "max"))
+
@@ -0,0 +1,197 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from google.cloud import bigquery
+
+
+DEFAULT_SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots")
+DEFAULT_TTL_SECONDS = 3600
+
+SNAPSHOT_COLUMNS = ["project_id", "dataset_id", "table_id", "table_type", "location",
+                    "created", "modified", "num_rows", "num_bytes"]
+
+# one query per region covers every dataset in it; TABLE_STORAGE.storage_last_modified_time only
+# moves on data writes, so it is kept as data_modified and used only where LAST_MODIFIED_QUERY has no row
+TABLES_QUERY = """
+    SELECT
+        t.table_schema AS dataset_id,
+        t.table_name AS table_id,
+        t.table_type,
+        t.creation_time AS created,
+        s.storage_last_modified_time AS data_modified,
+        s.total_rows AS num_rows,
+        s.total_logical_bytes AS num_bytes
+    FROM
+        `{project_id}.region-{location}.INFORMATION_SCHEMA.TABLES` AS t
+    LEFT JOIN
+        `{project_id}.region-{location}.INFORMATION_SCHEMA.TABLE_STORAGE` AS s
+    ON
+        s.table_schema = t.table_schema AND s.table_name = t.table_name AND NOT s.deleted
+"""
+
+# __TABLES__.last_modified_time is the API's Table.modified (data, schema and metadata changes);
+# it is per dataset, so one UNION ALL of LAST_MODIFIED_DATASET_QUERY covers up to this many datasets
+LAST_MODIFIED_DATASET_QUERY = """
+    SELECT dataset_id, table_id, TIMESTAMP_MILLIS(last_modified_time) AS modified
+    FROM `{project_id}.{dataset_id}.__TABLES__`
+"""
+LAST_MODIFIED_DATASETS_PER_QUERY = 200
+
+SCHEMATA_QUERY = """
+    SELECT schema_name AS dataset_id, location
+    FROM `{project_id}.region-{location}.INFORMATION_SCHEMA.SCHEMATA`
+"""
+
+# INFORMATION_SCHEMA table types mapped to the names the API uses
+TABLE_TYPES = {"BASE TABLE": "TABLE", "CLONE": "TABLE", "MATERIALIZED VIEW": "MATERIALIZED_VIEW"}
+
+
+def query_last_modified(client, project_id, dataset_ids):
+    """dataset_id, table_id, modified for every table of the given datasets, from __TABLES__."""
+    frames = [pd.DataFrame(columns=["dataset_id", "table_id", "modified"])]
+    for start in range(0, len(dataset_ids), LAST_MODIFIED_DATASETS_PER_QUERY):
+        query = " UNION ALL ".join(LAST_MODIFIED_DATASET_QUERY.format(project_id=project_id, dataset_id=dataset_id)
+                                   for dataset_id in dataset_ids[start:start + LAST_MODIFIED_DATASETS_PER_QUERY])
+        frames.append(client.query(query).to_dataframe())
+    return pd.concat(frames, ignore_index=True)
+
+
+def query_region(client, project_id, location):
+    """(datasets, tables) DataFrames for one region from INFORMATION_SCHEMA and __TABLES__."""
+    datasets = client.query(SCHEMATA_QUERY.format(project_id=project_id, location=location)).to_dataframe()
+    tables = client.query(TABLES_QUERY.format(project_id=project_id, location=location)).to_dataframe()
+    tables["table_type"] = tables["table_type"].replace(TABLE_TYPES)
+    last_modified = query_last_modified(client, project_id, list(datasets["dataset_id"]))
+    tables = tables.merge(last_modified, on=["dataset_id", "table_id"], how="left")
+    tables["modified"] = pd.to_datetime(tables["modified"], utc=True).fillna(
+        pd.to_datetime(tables["data_modified"], utc=True))
+    return datasets, tables.drop(columns=["data_modified"])
+
+
+def discover_locations(client, dataset_ids, max_workers=16):
+    """The distinct regions of the given datasets (e.g. ("eu", "europe-west2")), from get_dataset calls."""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return tuple(sorted({dataset.location.lower() for dataset in executor.map(client.get_dataset, dataset_ids)}))
+
+
+def collect_via_api(client, dataset_ids, max_workers=16):
+    """
+    (datasets, tables) for the given datasets through the API, with list_tables and get_table
+    calls spread over a thread pool. Used for regions INFORMATION_SCHEMA could not cover.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        dataset_objects = list(executor.map(client.get_dataset, dataset_ids))
+        table_items = [item for items in executor.map(lambda dataset_id: list(client.list_tables(dataset_id)), dataset_ids)
+                       for item in items]
+        tables = list(executor.map(lambda item: client.get_table(item.reference), table_items))
+
+    datasets = pd.DataFrame({"dataset_id": [dataset.dataset_id for dataset in dataset_objects],
+                             "location": [dataset.location for dataset in dataset_objects]})
+    tables = pd.DataFrame([{
+        "dataset_id": table.dataset_id,
+        "table_id": table.table_id,
+        "table_type": table.table_type,
+        "created": table.created,
+        "modified": table.modified,
+        "num_rows": table.num_rows,
+        "num_bytes": table.num_bytes,
+    } for table in tables], columns=["dataset_id", "table_id", "table_type", "created", "modified", "num_rows", "num_bytes"])
+    return datasets, tables
+
+
+def build_snapshot(project_id, locations=None, client=None, max_workers=16):
+    """
+    One row per table (and one row with a null table_id per empty dataset) for the whole project.
+    Each region in locations (by default every region the project has datasets in) is read with
+    INFORMATION_SCHEMA queries; datasets the queries did not return (regions not listed, or a
+    failed query) are filled in through the API concurrently.
+    """
+    client = client or bigquery.Client(project=project_id)
+    all_dataset_ids = [dataset.dataset_id for dataset in client.list_datasets(project_id)]
+    if locations is None:
+        locations = discover_locations(client, all_dataset_ids, max_workers=max_workers)
+
+    dataset_frames = [pd.DataFrame(columns=["dataset_id", "location"])]
+    table_frames = [pd.DataFrame(columns=["dataset_id", "table_id", "table_type", "created", "modified", "num_rows", "num_bytes"])]
+    for location in locations:
+        try:
+            datasets, tables = query_region(client, project_id, location)
+        except Exception as e:
+            print(f"INFORMATION_SCHEMA query for region-{location} failed, using the API instead: {e}")
+            continue
+        dataset_frames.append(datasets)
+        table_frames.append(tables)
+
+    covered = set().union(*[set(frame["dataset_id"]) for frame in dataset_frames])
+    missing = [dataset_id for dataset_id in all_dataset_ids if dataset_id not in covered]
+    if missing:
+        print(f"Collecting {len(missing)} datasets through the API")
+        datasets, tables = collect_via_api(client, missing, max_workers=max_workers)
+        dataset_frames.append(datasets)
+        table_frames.append(tables)
+
+    datasets = pd.concat(dataset_frames, ignore_index=True)
+    datasets = datasets[datasets["dataset_id"].isin(all_dataset_ids)]
+    tables = pd.concat(table_frames, ignore_index=True)
+    snapshot = datasets.merge(tables, on="dataset_id", how="left")
+    snapshot["project_id"] = project_id
+    for column in ("created", "modified"):
+        snapshot[column] = pd.to_datetime(snapshot[column], utc=True)
+    for column in ("num_rows", "num_bytes"):
+        snapshot[column] = snapshot[column].astype("Int64")
+    return snapshot[SNAPSHOT_COLUMNS].sort_values(["dataset_id", "table_id"], ignore_index=True)
+
+
+class MetadataSnapshot:
+    """
+    Local Parquet snapshot of the table metadata of a project: dataset/table names, types,
+    created/modified times, row counts and sizes. Refetched when older than ttl, so checks
+    run repeatedly in a session read the local file instead of the API.
+    """
+    def __init__(self, project_id, path=None, ttl=DEFAULT_TTL_SECONDS, locations=None):
+        self.project_id = project_id
+        self.path = path or os.path.join(DEFAULT_SNAPSHOT_DIR, f"{project_id}.parquet")
+        self.ttl = ttl
+        # BigQuery regions to read through INFORMATION_SCHEMA, e.g. ("eu",); None finds them from the datasets
+        self.locations = tuple(locations) if locations is not None else None
+
+    def fetched_at(self):
+        if not os.path.exists(self.path):
+            return None
+        metadata = pq.read_schema(self.path).metadata or {}
+        return float(metadata.get(b"fetched_at", b"0"))
+
+    def is_fresh(self):
+        fetched_at = self.fetched_at()
+        return fetched_at is not None and time.time() - fetched_at < self.ttl
+
+    def refresh(self, client=None):
+        """Rebuild the snapshot from BigQuery and rewrite the local file."""
+        start_time = time.time()
+        snapshot = build_snapshot(self.project_id, self.locations, client=client)
+        table = pa.Table.from_pandas(snapshot, preserve_index=False)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            "fetched_at": str(time.time()),
+            "fetched_at_iso": datetime.now(timezone.utc).isoformat(),
+        })
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        pq.write_table(table, self.path)
+        print(f"Snapshot of {snapshot['table_id'].count()} tables in {snapshot['dataset_id'].nunique()} datasets "
+              f"written to {self.path} in {time.time() - start_time:.1f}s")
+        return snapshot
+
+    def load(self, force_refresh=False, client=None):
+        if force_refresh or not self.is_fresh():
+            return self.refresh(client=client)
+        return pd.read_parquet(self.path)
+
+
+def get_snapshot(project_id, force_refresh=False, **snapshot_config):
+    """The metadata snapshot DataFrame for a project, from the local file while it is fresh."""
+    return MetadataSnapshot(project_id, **snapshot_config).load(force_refresh=force_refresh)
@@ -0,0 +1,198 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+
+from google.genai import types
+
+from gemini_article_summarisation import USER_PROMPT_TEMPLATE
+
+
+class BatchBackend(ABC):
+    """
+    Where batch jobs run. submit() takes a local JSONL file of requests and returns a job name,
+    state() returns "running", "succeeded" or "failed", and iter_results() yields output lines
+    (dicts with the original "request" and a "response" or "status").
+    """
+    @abstractmethod
+    def submit(self, input_path, model_name):
+        ...
+
+    @abstractmethod
+    def state(self, job_name):
+        ...
+
+    @abstractmethod
+    def iter_results(self, job_name):
+        ...
+
+
+class VertexBatchBackend(BatchBackend):
+    """Runs batch prediction jobs on Vertex AI, staging input and output in GCS."""
+    def __init__(self, genai_client, bucket, prefix="byte_batch", project_id=None):
+        from google.cloud import storage
+
+        self.genai_client = genai_client
+        self.storage_client = storage.Client(project=project_id)
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def submit(self, input_path, model_name):
+        run_prefix = f"{self.prefix}/{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.storage_client.bucket(self.bucket).blob(f"{run_prefix}/input.jsonl").upload_from_filename(input_path)
+        job = self.genai_client.batches.create(
+            model=model_name,
+            src=f"gs://{self.bucket}/{run_prefix}/input.jsonl",
+            config=types.CreateBatchJobConfig(dest=f"gs://{self.bucket}/{run_prefix}/output"),
+        )
+        return job.name
+
+    def state(self, job_name):
+        state = self.genai_client.batches.get(name=job_name).state
+        if state == types.JobState.JOB_STATE_SUCCEEDED:
+            return "succeeded"
+        if state in (types.JobState.JOB_STATE_FAILED, types.JobState.JOB_STATE_CANCELLED, types.JobState.JOB_STATE_EXPIRED):
+            return "failed"
+        return "running"
+
+    def iter_results(self, job_name):
+        output_uri = self.genai_client.batches.get(name=job_name).dest.gcs_uri
+        bucket_name, _, output_prefix = output_uri.removeprefix("gs://").partition("/")
+        for blob in self.storage_client.list_blobs(bucket_name, prefix=output_prefix):
+            if not blob.name.endswith(".jsonl"):
+                continue
+            with blob.open("r") as output_file:
+                for line in output_file:
+                    if line.strip():
+                        yield json.loads(line)
+
+
+class LocalFileBatchBackend(BatchBackend):
+    """
+    Offline stand-in for a batch service: each job is a directory under work_dir, and the output
+    file is produced by calling respond(prompt_text) for every request. Used to test the batch path
+    end to end without Vertex.
+    """
+    def __init__(self, work_dir="batch_jobs", respond=None, fail_ids=()):
+        self.work_dir = work_dir
+        self.respond = respond or (lambda prompt_text: f"•Offline summary of {len(prompt_text)} characters")
+        self.fail_ids = set(fail_ids)
+        os.makedirs(work_dir, exist_ok=True)
+
+    def submit(self, input_path, model_name):
+        job_name = f"local-{uuid.uuid4().hex[:8]}"
+        job_dir = os.path.join(self.work_dir, job_name)
+        os.makedirs(job_dir)
+        with open(input_path, encoding="utf-8") as input_file, \
+                open(os.path.join(job_dir, "predictions.jsonl"), "w", encoding="utf-8") as output_file:
+            for line in input_file:
+                request = json.loads(line)["request"]
+                if request["labels"]["request_id"] in self.fail_ids:
+                    result = {"request": request, "status": "offline backend failure"}
+                else:
+                    prompt_text = request["contents"][0]["parts"][0]["text"]
+                    result = {"request": request,
+                              "response": {"candidates": [{"content": {"parts": [{"text": self.respond(prompt_text)}]}}]}}
+                output_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+        return job_name
+
+    def state(self, job_name):
+        return "succeeded"
+
+    def iter_results(self, job_name):
+        with open(os.path.join(self.work_dir, job_name, "predictions.jsonl"), encoding="utf-8") as output_file:
+            for line in output_file:
+                yield json.loads(line)
+
+
+class BatchArticleSummariser:
+    """
+    Summarises many articles as one batch job instead of one online call each.
+    Requests are written as JSONL with a stable request id (the summary cache key) in the request
+    labels, submitted through a BatchBackend, polled until done and joined back by that id.
+    """
+    def __init__(self, summariser, backend, work_dir="batch_jobs", poll_interval=30, timeout=24 * 3600):
+        self.summariser = summariser
+        self.backend = backend
+        self.work_dir = work_dir
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        os.makedirs(work_dir, exist_ok=True)
+
+    def build_request(self, article_text, request_id):
+        generation_config = self.summariser.model_configuration.model_dump(mode="json",
+                                                                            exclude={"system_instruction"},
+                                                                            exclude_none=True)
+        return {"request": {
+            "contents": [{"role": "user", "parts": [{"text": USER_PROMPT_TEMPLATE.format(article_text=article_text)}]}],
+            "systemInstruction": {"parts": [{"text": self.summariser.summarisation_prompt}]},
+            "generationConfig": generation_config,
+            "labels": {"request_id": request_id},
+        }}
+
+    def write_requests(self, texts):
+        """Write one request per distinct article and return (input_path, request ids in input order)."""
+        input_path = os.path.join(self.work_dir, f"requests_{uuid.uuid4().hex[:8]}.jsonl")
+        request_ids = []
+        written = set()
+        with open(input_path, "w", encoding="utf-8") as input_file:
+            for text in texts:
+                # labels values are limited to 63 characters
+                request_id = self.summariser.cache_key(text)[:63]
+                request_ids.append(request_id)
+                if request_id not in written:
+                    input_file.write(json.dumps(self.build_request(text, request_id), ensure_ascii=False) + "\n")
+                    written.add(request_id)
+        print(f"Wrote {len(written)} batch requests for {len(request_ids)} articles to {input_path}")
+        return input_path, request_ids
+
+    async def wait(self, job_name):
+        start_time = time.monotonic()
+        while True:
+            state = await asyncio.to_thread(self.backend.state, job_name)
+            if state != "running":
+                print(f"Batch job {job_name} {state} after {time.monotonic() - start_time:.0f}s")
+                return state
+            if time.monotonic() - start_time > self.timeout:
+                raise TimeoutError(f"Batch job {job_name} still running after {self.timeout}s")
+            await asyncio.sleep(self.poll_interval)
+
+    def read_results(self, job_name):
+        """({request_id: summary}, {request_id: error}) from the output of a finished job."""
+        summaries_by_id = {}
+        errors_by_id = {}
+        for result in self.backend.iter_results(job_name):
+            request_id = result["request"]["labels"]["request_id"]
+            try:
+                summaries_by_id[request_id] = result["response"]["candidates"][0]["content"]["parts"][0]["text"].strip()
+            except (KeyError, IndexError, TypeError):
+                errors_by_id[request_id] = RuntimeError(result.get("status") or "no summary in batch response")
+        return summaries_by_id, errors_by_id
+
+    async def summarise(self, texts):
+        """Return (summaries in input order, {index: error}) like SummaryScheduler.run."""
+        texts = list(texts)
+        input_path, request_ids = self.write_requests(texts)
+        job_name = await asyncio.to_thread(self.backend.submit, input_path, self.summariser.model_name)
+        print(f"Submitted batch job {job_name}")
+        state = await self.wait(job_name)
+        if state != "succeeded":
+            error = RuntimeError(f"Batch job {job_name} {state}")
+            return [None] * len(texts), {i: error for i in range(len(texts))}
+
+        # the backends read files and GCS blobs synchronously, so keep that off the event loop
+        summaries_by_id, errors_by_id = await asyncio.to_thread(self.read_results, job_name)
+
+        summaries, failures = [], {}
+        for i, (text, request_id) in enumerate(zip(texts, request_ids)):
+            summary = summaries_by_id.get(request_id)
+            if summary is None:
+                failures[i] = errors_by_id.get(request_id, RuntimeError("missing from batch output"))
+            elif self.summariser.cache is not None:
+                self.summariser.cache.put(self.summariser.cache_key(text), summary, self.summariser.model_name)
+            summaries.append(summary)
+
+        print(f"Batch job {job_name}: {len(texts) - len(failures)}/{len(texts)} summaries, {len(failures)} failed")
+        return summaries, failures
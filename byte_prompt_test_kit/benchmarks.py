@@ -0,0 +1,115 @@
+"""
+Local benchmarks for the summarisation scheduling. Nothing here touches Vertex AI;
+run e.g. `python benchmarks.py scheduler --articles 200 --max-rate 20 --latency 0.5`.
+"""
+import argparse
+import asyncio
+import random
+import time
+import types as namespace
+from collections import deque
+
+from google.genai import errors
+
+from gemini_article_summarisation import GeminiArticleSummariser
+from summary_scheduler import SummaryScheduler
+
+
+class FakeModels:
+    """
+    Stand-in for client.aio.models: generate_content waits latency seconds, then answers 429 once
+    more than max_rate requests arrived in the last second and a 503 for server_error_rate of the
+    rest. Counts calls and errors.
+    """
+    def __init__(self, max_rate=20, latency=0.5, server_error_rate=0.05, seed=0):
+        self.max_rate = max_rate
+        self.latency = latency
+        self.server_error_rate = server_error_rate
+        self.random = random.Random(seed)
+        self.arrivals = deque()
+        self.calls = 0
+        self.errors = {429: 0, 503: 0}
+
+    async def generate_content(self, model, config, contents):
+        self.calls += 1
+        now = time.monotonic()
+        self.arrivals.append(now)
+        while self.arrivals and self.arrivals[0] < now - 1:
+            self.arrivals.popleft()
+        over_quota = len(self.arrivals) > self.max_rate
+        server_error = self.random.random() < self.server_error_rate
+        await asyncio.sleep(self.latency)
+
+        if over_quota:
+            self.errors[429] += 1
+            raise errors.ClientError(429, {"error": {"code": 429, "message": "Resource exhausted",
+                                                     "status": "RESOURCE_EXHAUSTED"}})
+        if server_error:
+            self.errors[503] += 1
+            raise errors.ServerError(503, {"error": {"code": 503, "message": "Service unavailable",
+                                                     "status": "UNAVAILABLE"}})
+        text = contents[0]["parts"][0]["text"]
+        part = namespace.SimpleNamespace(text=f"• Summary of {len(text)} characters")
+        return namespace.SimpleNamespace(
+            candidates=[namespace.SimpleNamespace(content=namespace.SimpleNamespace(parts=[part]))],
+            usage_metadata=namespace.SimpleNamespace(prompt_token_count=len(text) // 4,
+                                                     candidates_token_count=20,
+                                                     cached_content_token_count=0),
+        )
+
+
+class FakeGenaiClient:
+    """Just enough of genai.Client for GeminiArticleSummariser without context caching."""
+    def __init__(self, **models_config):
+        self.aio = namespace.SimpleNamespace(models=FakeModels(**models_config))
+
+
+def make_articles(count):
+    return [f"Article {i}. " + "Bank results were ahead of expectations. " * 50 for i in range(count)]
+
+
+async def legacy_summarise(summariser, articles):
+    """The previous loop: every article at once through generate_summary, no retries."""
+    return await asyncio.gather(*[summariser.generate_summary(article_text=text) for text in articles])
+
+
+async def scheduled_summarise(summariser, articles, concurrency, base_delay):
+    scheduler = SummaryScheduler(concurrency=concurrency, requests_per_minute=None, base_delay=base_delay)
+    summaries, _ = await scheduler.run(articles, summariser.request_summary)
+    return summaries
+
+
+def bench_scheduler(articles=200, max_rate=20, latency=0.5, server_error_rate=0.05, concurrency=8, base_delay=0.5):
+    """Summaries/s and failures of the legacy gather loop and the SummaryScheduler against the same fake quota."""
+    article_texts = make_articles(articles)
+    runs = {
+        "legacy": legacy_summarise,
+        "scheduler": lambda summariser, texts: scheduled_summarise(summariser, texts, concurrency, base_delay),
+    }
+    for name, summarise in runs.items():
+        client = FakeGenaiClient(max_rate=max_rate, latency=latency, server_error_rate=server_error_rate)
+        summariser = GeminiArticleSummariser(summarisation_prompt="Summarise in bullet points.", client=client)
+        start = time.monotonic()
+        summaries = asyncio.run(summarise(summariser, article_texts))
+        elapsed = time.monotonic() - start
+        done = sum(summary is not None for summary in summaries)
+        models = client.aio.models
+        print(f"{name}: {done}/{len(article_texts)} summarised in {elapsed:.1f}s ({done / elapsed:.1f}/s), "
+              f"{models.calls} calls, {models.errors[429]} x 429, {models.errors[503]} x 503")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("benchmark", choices=["scheduler"])
+    parser.add_argument("--articles", type=int, default=200)
+    parser.add_argument("--max-rate", type=int, default=20, help="requests/s the fake API accepts before 429s")
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per fake generate_content call")
+    parser.add_argument("--server-error-rate", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--base-delay", type=float, default=0.5, help="scheduler backoff base in seconds")
+    args = parser.parse_args()
+
+    if args.benchmark == "scheduler":
+        bench_scheduler(articles=args.articles, max_rate=args.max_rate, latency=args.latency,
+                        server_error_rate=args.server_error_rate, concurrency=args.concurrency,
+                        base_delay=args.base_delay)
@@ -1,39 +1,171 @@
 import pandas as pd 
 from typing import Literal
 import asyncio
+from collections import defaultdict
 from dotenv import load_dotenv
 load_dotenv()
 
 from gemini_article_summarisation import GeminiArticleSummariser
 from summary_prompts import get_summary_prompt
+from summary_scheduler import SummaryScheduler
+from summary_cache import SummaryCache
+from batch_summarisation import BatchArticleSummariser
+from summary_metrics import CallMetricsRecorder
+from preprocessing import ArticlePreprocessor
+from results_store import OUTPUT_COLUMNS, ResultsStore, article_keys, read_articles
 
 class ByteSummarisation(object):
     def __init__(self,
                  sector: Literal["Index Bank", "Insurance1000", "Index Insurance", "Payments", "Index1000", "Other"],
                  test_run=False,
+                 concurrency=8,
+                 requests_per_minute=60,
+                 tokens_per_minute=None,
+                 max_retries=5,
+                 genai_client=None,
+                 cache_path="summary_cache.sqlite",
+                 bypass_cache=False,
+                 mode: Literal["online", "batch"] = "online",
+                 batch_backend=None,
+                 use_context_cache=True,
+                 metrics_path="summary_metrics.jsonl",
+                 scheduler=None,
+                 preprocess=True,
+                 max_input_tokens=8000,
+                 dedupe_threshold=0.8,
                  ):
         
         self.sector = sector
         self.test_run = test_run
         self.project_id = 'evident-data-dev'
+        self.genai_client = genai_client
+        # set cache_path=None to disable the summary cache
+        self.cache_path = cache_path
+        self.bypass_cache = bypass_cache
+        # "batch" submits all uncached articles as one job through batch_backend
+        if mode == "batch" and batch_backend is None:
+            raise ValueError("mode='batch' needs a batch_backend, e.g. VertexBatchBackend or LocalFileBatchBackend")
+        self.mode = mode
+        self.batch_backend = batch_backend
+        self.scheduler_config = dict(concurrency=concurrency,
+                                     requests_per_minute=requests_per_minute,
+                                     tokens_per_minute=tokens_per_minute,
+                                     max_retries=max_retries)
+        # a SummaryScheduler shared between workflows puts them under one global budget
+        self.scheduler = scheduler
+        # strip boilerplate, truncate to max_input_tokens and summarise near-duplicates once
+        self.preprocessor = ArticlePreprocessor(max_input_tokens=max_input_tokens,
+                                                similarity_threshold=dedupe_threshold) if preprocess else None
+        # reuse the sector prompt as cached content instead of resending it with every request
+        self.use_context_cache = use_context_cache
+        # per-call token/latency records are appended here, set to None to keep them in memory only
+        self.metrics_path = metrics_path
+        self.metrics = None
+        self.failures = {}
     
-    async def summarise(self, articles):
-        summariser = GeminiArticleSummariser(summarisation_prompt=get_summary_prompt(self.sector), project_id=self.project_id)
-        coroutines = [summariser.generate_summary(article_text=text) for text in articles.body.values]
-        summaries = await asyncio.gather(*coroutines)
-        return summaries
+    async def summarise(self, articles, on_result=None):
+        """
+        Summaries for articles.body in input order. on_result(index, summary, error) is called for
+        every article as soon as its summary is known (cache hits first, then as calls complete).
+        """
+        cache = SummaryCache(self.cache_path, bypass=self.bypass_cache) if self.cache_path else None
+        self.metrics = CallMetricsRecorder(self.metrics_path)
+        summariser = GeminiArticleSummariser(summarisation_prompt=get_summary_prompt(self.sector),
+                                             project_id=self.project_id,
+                                             client=self.genai_client,
+                                             cache=cache,
+                                             metrics=self.metrics,
+                                             use_context_cache=self.use_context_cache and self.mode == "online")
+        # the context cache is billed until deleted, so clean up even when summarising fails
+        try:
+            texts = list(articles.body.values)
+            # near-duplicates share one summary: unique_texts are summarised and fanned out by assignment
+            if self.preprocessor is not None:
+                unique_texts, assignment = self.preprocessor.prepare(texts)
+                self.preprocessor.print_report()
+            else:
+                unique_texts, assignment = texts, list(range(len(texts)))
+            members = defaultdict(list)
+            for i, unique_index in enumerate(assignment):
+                members[unique_index].append(i)
 
-    def trigger_workflow(self):
+            def emit(unique_index, summary, error):
+                if on_result is not None:
+                    for i in members[unique_index]:
+                        on_result(i, summary, error)
 
-        # importing articles from excel sheet instead
-        articles = pd.read_excel("input_output/articles_input.xlsx", dtype={"date_published": str})
+            unique_summaries = [summariser.cached_summary(text) for text in unique_texts]
+            to_summarise = [i for i, summary in enumerate(unique_summaries) if summary is None]
+            for i, summary in enumerate(unique_summaries):
+                if summary is not None:
+                    emit(i, summary, None)
 
-        print(f"Number Of Articles: {articles.shape[0]}")
+            if self.mode == "batch":
+                batch_summariser = BatchArticleSummariser(summariser, self.batch_backend)
+                new_summaries, failures = await batch_summariser.summarise([unique_texts[i] for i in to_summarise])
+                for i, summary in enumerate(new_summaries):
+                    emit(to_summarise[i], summary, failures.get(i))
+            else:
+                # built inside the running loop so its semaphore and locks belong to it
+                scheduler = self.scheduler or SummaryScheduler(**self.scheduler_config)
+                prompt_tokens = len(summariser.summarisation_prompt) // 4
+                new_summaries, failures = await scheduler.run([unique_texts[i] for i in to_summarise],
+                                                              lambda text: summariser.request_summary(text, check_cache=False),
+                                                              estimate_tokens=lambda text: prompt_tokens + len(str(text)) // 4,
+                                                              label=f"{self.sector} summaries",
+                                                              on_result=lambda i, summary, error: emit(to_summarise[i], summary, error))
+            for i, summary in zip(to_summarise, new_summaries):
+                unique_summaries[i] = summary
+            summaries = [unique_summaries[unique_index] for unique_index in assignment]
+            self.failures = {i: error for unique_index, error in failures.items() for i in members[to_summarise[unique_index]]}
+            return summaries
+        finally:
+            await summariser.delete_context_cache()
+            if self.metrics.records:
+                self.metrics.print_summary()
+            self.metrics.close()
+            if cache is not None:
+                cache.print_stats()
+                cache.close()
 
-        # summarise
-        summaries = asyncio.run(self.summarise(articles=articles))
-        articles['summary'] = summaries
+    def trigger_workflow(self, input_path="input_output/articles_input.xlsx", results_path=None, resume=False):
+        """
+        Summarise the articles in input_path (.xlsx, .csv, .parquet or .feather).
+        With results_path, each summary is appended to that JSONL file as soon as it completes and,
+        with resume=True, rows that already have a summary there are skipped.
+        """
+        articles = read_articles(input_path)
+        return asyncio.run(self.run_workflow(articles, results_path=results_path, resume=resume))
+
+    async def run_workflow(self, articles, results_path=None, resume=False):
+        """Async body of trigger_workflow for already loaded articles, so several sectors can share a loop."""
+        print(f"Number Of Articles ({self.sector}): {articles.shape[0]}")
+
+        if results_path is None:
+            # summarise
+            summaries = await self.summarise(articles=articles)
+            articles = articles.copy()
+            articles['summary'] = summaries
+            # failed articles are kept with the error instead of a silent blank summary
+            articles['summary_error'] = [str(self.failures[i]) if i in self.failures else None for i in range(len(articles))]
+        else:
+            store = ResultsStore(results_path, resume=resume)
+            keys = article_keys(articles)
+            done = store.done_keys(self.sector) if resume else set()
+            pending = [i for i, key in enumerate(keys) if key not in done]
+            if resume:
+                print(f"Resuming from {results_path}: {len(keys) - len(pending)} done, {len(pending)} to summarise")
+
+            def write_result(index, summary, error):
+                store.append(keys[pending[index]], self.sector, summary, error)
+
+            try:
+                await self.summarise(articles=articles.iloc[pending].reset_index(drop=True),
+                                     on_result=write_result)
+            finally:
+                store.close()
+            articles = store.merge(articles, self.sector)
 
         # reorder cols 
-        articles = articles[["url", "title", "body", "source_name", "date_published", "pillar", "summary"]]
+        articles = articles[OUTPUT_COLUMNS]
         return articles
@@ -1,23 +1,66 @@
+import asyncio
+import time
+
 from google import genai
-from google.genai import types
+from google.genai import errors, types
+
+from summary_cache import summary_cache_key
+
+
+USER_PROMPT_TEMPLATE = ("You are an editor with 20 years experience at the New York Times."
+                        "You are very skilled at producing bullet point summaries of articles."
+                        "Please summarise the following article using the instructions below:\n\n<article>{article_text}</article>"
+)
+
+def is_context_cache_error(error):
+    """
+    Whether a ClientError is about the cached content rather than the request: an expired or
+    deleted cache (404, or a 400/403 whose message names the cached content).
+    """
+    if error.code == 404:
+        return True
+    message = (error.message or "").lower()
+    return error.code in (400, 403) and ("cached content" in message or "cachedcontent" in message)
+
+def create_genai_client(project_id=None):
+    """Vertex AI client; share one across summarisers so they reuse its connection pool."""
+    return genai.Client(
+        vertexai=True,
+        project=project_id,
+        location="europe-west1",
+    )
 
 # ---- Gemini Summariser ----
 class GeminiArticleSummariser:
     def __init__(self,
                  summarisation_prompt,
                  model_name = "google/gemini-2.5-pro",
-                 project_id=None):
+                 project_id=None,
+                 client=None,
+                 cache=None,
+                 metrics=None,
+                 metrics_labels=None,
+                 use_context_cache=False,
+                 context_cache_ttl="3600s"):
         self.summarisation_prompt = summarisation_prompt
         self.model_name = model_name
         self.project_id = project_id
-        
+        self.cache = cache
+        # optional CallMetricsRecorder, one record per API call
+        self.metrics = metrics
+        # extra fields on every metrics record, e.g. {"variant": "pyramid"}
+        self.metrics_labels = metrics_labels or {}
 
-        # gemini client and configuration
-        self.google_genai_client = genai.Client(
-            vertexai=True,
-            project=project_id,
-            location="europe-west1",
-        )
+        # the system prompt is the same for every article, so it can be stored once as cached content
+        self.use_context_cache = use_context_cache
+        self.context_cache_ttl = context_cache_ttl
+        self.context_cache_name = None
+        self.context_cache_failed = False
+        self.cached_configuration = None
+        self.context_cache_lock = asyncio.Lock()
+
+        # gemini client and configuration, a shared client can be passed in
+        self.google_genai_client = client or create_genai_client(project_id)
 
         # model config
         self.model_configuration = types.GenerateContentConfig(
@@ -26,25 +69,123 @@ class GeminiArticleSummariser:
             max_output_tokens=20000
         )
 
-    async def generate_summary(self, article_text):
+    def cache_key(self, article_text):
+        """Hash of (model, system prompt, user template, generation config, article text)."""
+        generation_config = self.model_configuration.model_dump(mode="json",
+                                                                exclude={"system_instruction"},
+                                                                exclude_none=True)
+        return summary_cache_key(self.model_name,
+                                 self.summarisation_prompt,
+                                 USER_PROMPT_TEMPLATE,
+                                 generation_config,
+                                 article_text)
+
+    def cached_summary(self, article_text):
+        """The cached summary for an article, or None if there is no cache or no entry."""
+        if self.cache is None:
+            return None
+        return self.cache.get(self.cache_key(article_text))
+
+    async def context_cache_configuration(self):
+        """
+        Config that references a cached copy of the system prompt, created on first use.
+        Returns None when context caching is off or not available (e.g. the prompt is below the
+        model's minimum cacheable size), in which case the prompt is sent with every request.
+        """
+        if not self.use_context_cache or self.context_cache_failed:
+            return None
+        async with self.context_cache_lock:
+            if self.cached_configuration is None and not self.context_cache_failed:
+                try:
+                    cached_content = await self.google_genai_client.aio.caches.create(
+                        model=self.model_name,
+                        config=types.CreateCachedContentConfig(
+                            system_instruction=self.summarisation_prompt,
+                            ttl=self.context_cache_ttl,
+                        ),
+                    )
+                except Exception as e:
+                    print(f"Context caching unavailable, sending the system prompt with every request: {e}")
+                    self.context_cache_failed = True
+                    return None
+                self.context_cache_name = cached_content.name
+                self.cached_configuration = self.model_configuration.model_copy(
+                    update={"system_instruction": None, "cached_content": cached_content.name}
+                )
+                print(f"Created context cache {cached_content.name}")
+        return self.cached_configuration
+
+    async def delete_context_cache(self):
+        if self.context_cache_name is None:
+            return
         try:
-            # Format the input
-            user_input = (f"You are an editor with 20 years experience at the New York Times."
-                         f"You are very skilled at producing bullet point summaries of articles."
-                         f"Please summarise the following article using the instructions below:\n\n<article>{article_text}</article>"
-            )
-            # Send the request
-            response = await self.google_genai_client.aio.models.generate_content(
-                model=self.model_name,
-                config=self.model_configuration,
-                contents=[{"role": "user", "parts": [{"text": user_input}]}],
-            )
+            await self.google_genai_client.aio.caches.delete(name=self.context_cache_name)
+        except Exception as e:
+            print(f"Could not delete context cache {self.context_cache_name}: {e}")
+        self.context_cache_name = None
+        self.cached_configuration = None
+
+    async def generate_content(self, user_input):
+        """Call the model, using the cached system prompt when there is one."""
+        contents = [{"role": "user", "parts": [{"text": user_input}]}]
+        configuration = await self.context_cache_configuration()
+        if configuration is not None:
+            try:
+                return await self.google_genai_client.aio.models.generate_content(
+                    model=self.model_name, config=configuration, contents=contents,
+                ), True
+            except errors.ClientError as e:
+                # only errors about the cache itself fall back, anything else (a bad request, 429) is for the caller
+                if not is_context_cache_error(e):
+                    raise
+                print(f"Context cache rejected ({e}), falling back to the system prompt")
+                self.context_cache_failed = True
+                self.cached_configuration = None
+        return await self.google_genai_client.aio.models.generate_content(
+            model=self.model_name, config=self.model_configuration, contents=contents,
+        ), False
 
+    async def request_summary(self, article_text, check_cache=True):
+        """
+        Summarise one article, raising any API error so the caller can retry it.
+        With a SummaryCache, articles whose cache key is unchanged are served from the cache
+        (pass check_cache=False if the caller already looked it up) and new summaries are stored.
+        """
+        if check_cache:
+            cached_summary = self.cached_summary(article_text)
+            if cached_summary is not None:
+                return cached_summary
+
+        request_key = self.cache_key(article_text)
+        # Format the input
+        user_input = USER_PROMPT_TEMPLATE.format(article_text=article_text)
+        # Send the request
+        start_time = time.monotonic()
+        try:
+            response, context_cached = await self.generate_content(user_input)
             # Extract response
-            print(f"Response: {response}")
-            summary = response.candidates[0].content.parts[0].text
-        
-            return summary.strip()
+            summary = response.candidates[0].content.parts[0].text.strip()
+        except Exception as e:
+            if self.metrics is not None:
+                self.metrics.record(request_key, self.model_name, "error",
+                                    latency=time.monotonic() - start_time, error=e, **self.metrics_labels)
+            raise
+
+        if self.metrics is not None:
+            self.metrics.record(request_key, self.model_name, "ok",
+                                latency=time.monotonic() - start_time,
+                                usage_metadata=response.usage_metadata,
+                                context_cached=context_cached,
+                                **self.metrics_labels)
+
+        if self.cache is not None:
+            self.cache.put(request_key, summary, self.model_name)
+    
+        return summary
+
+    async def generate_summary(self, article_text):
+        try:
+            return await self.request_summary(article_text)
 
         except Exception as e:
             print(f"Error summarising article: {e}")
@@ -59,4 +200,4 @@ class GeminiArticleSummariser:
         summary = summary.replace('• ', '•')
         summary = summary.removeprefix('\n')
 
-        return summary
\ No newline at end of file
+        return summary
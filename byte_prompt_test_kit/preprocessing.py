@@ -0,0 +1,189 @@
+import re
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+
+# lines that are page furniture rather than article content; each alternative matches a whole short
+# notice, so article sentences that merely start with "Copyright", "Click here" or "Reporting by" survive
+MAX_BOILERPLATE_CHARS = 160
+# a credit's names: capitalised words joined by spaces, commas, "and" or "in" (case-sensitive)
+CREDIT_NAMES = r"(?-i:[A-Z][\w'’.-]*)(?:(?:\s+|\s*,\s*|\s+and\s+|\s+in\s+)(?-i:[A-Z][\w'’./-]*))*"
+BOILERPLATE_PATTERN = re.compile(
+    r"^\s*(?:"
+    r"advertisement|sponsored content|"
+    r"(?:subscribe|sign up|register)\b.{0,60}\b(?:newsletter|subscription|free|today|now)\W*|"
+    r"(?:click|tap) here(?: (?:to|for)\b.{0,60})?|"
+    r"(?:read|see) (?:more|also)\s*:.*|related(?: articles| stories)?\s*:.*|"
+    r"(?:follow|like) us on\b.{0,60}|share (?:this|on)\b.{0,40}|"
+    r"(?:©\s*(?:copyright\s*)?|copyright\s*(?:©\s*)?)(?:19|20)\d{2}\b.{0,100}|"
+    r"(?:©|copyright) ?(?-i:[A-Z])[^.!?]{0,60}\.? ?all rights reserved\.?|all rights reserved\.?|"
+    r"this (?:site|website) uses cookies\b.*|we use cookies\b.*|accept (?:all )?cookies|"
+    r"(?:(?:additional )?reporting|writing|editing) by " + CREDIT_NAMES
+    + r"(?:\s*[;,]\s*(?:additional )?(?:reporting|writing|editing) by " + CREDIT_NAMES + r")*\.?|"
+    r"(?:photo(?:graph)?|image)(?: credit)?s?\s*:[^!?]{0,100}"
+    r")\s*$",
+    re.IGNORECASE,
+)
+WORD_PATTERN = re.compile(r"\w+")
+
+CHARS_PER_TOKEN = 4
+# MinHash permutations are (a * hash + b) mod a Mersenne prime, truncated to 32 bits; the uint64
+# product is allowed to wrap, which keeps the permutations independent enough and fully vectorised
+MINHASH_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN
+
+
+def strip_boilerplate(text):
+    """Drop boilerplate lines and collapse the blank lines and spaces left behind."""
+    lines = [line.strip() for line in text.splitlines()]
+    lines = [line for line in lines
+             if len(line) > MAX_BOILERPLATE_CHARS or not BOILERPLATE_PATTERN.match(line)]
+    text = "\n".join(lines)
+    text = re.sub(r"[ \t]+", " ", text)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def truncate_to_token_budget(text, max_tokens):
+    """Cut text to about max_tokens, at the last paragraph or sentence end before the limit."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    # only back off to a boundary if that keeps most of the budget
+    for boundary in ("\n\n", "\n", ". "):
+        position = cut.rfind(boundary)
+        if position > max_chars * 0.8:
+            return cut[:position + 1].strip()
+    return cut.strip()
+
+
+def shingles(text, size=5):
+    """Hashes of the word size-grams of a text (the whole text if it is shorter)."""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        grams = [" ".join(words)]
+    else:
+        grams = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+class MinHashLSH:
+    """
+    MinHash signatures banded into an LSH index. Pairs that share a band bucket are candidates
+    and are kept if their estimated Jaccard similarity is at least threshold.
+    """
+    def __init__(self, num_perm=128, bands=16, threshold=0.8, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, MINHASH_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, MINHASH_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_hashes):
+        hashed = ((np.outer(shingle_hashes, self.a) + self.b) % MINHASH_PRIME) & MAX_HASH
+        return hashed.min(axis=0)
+
+    def similar_pairs(self, signatures):
+        buckets = defaultdict(list)
+        for index, signature in enumerate(signatures):
+            for band in range(self.bands):
+                buckets[(band, signature[band * self.rows:(band + 1) * self.rows].tobytes())].append(index)
+        pairs = set()
+        for members in buckets.values():
+            for position, first in enumerate(members):
+                for second in members[position + 1:]:
+                    if (first, second) not in pairs and \
+                            np.mean(signatures[first] == signatures[second]) >= self.threshold:
+                        pairs.add((first, second))
+        return pairs
+
+
+class ArticlePreprocessor:
+    """
+    Prepares article texts before summarisation: strips boilerplate, truncates to a token budget
+    and collapses near-duplicates (e.g. syndicated wire stories) so one representative per cluster
+    is summarised and its summary fanned out to the others.
+    """
+    def __init__(self, max_input_tokens=8000, strip=True, dedupe=True, similarity_threshold=0.8,
+                 num_perm=128, bands=16):
+        self.max_input_tokens = max_input_tokens
+        self.strip = strip
+        self.dedupe = dedupe
+        self.lsh = MinHashLSH(num_perm=num_perm, bands=bands, threshold=similarity_threshold)
+        self.stats = {}
+
+    def clean(self, text):
+        text = text if isinstance(text, str) else ""
+        if self.strip:
+            text = strip_boilerplate(text)
+        if self.max_input_tokens:
+            text = truncate_to_token_budget(text, self.max_input_tokens)
+        return text
+
+    def clusters(self, texts):
+        """Cluster id (the smallest member index) for every text."""
+        parent = list(range(len(texts)))
+
+        def find(index):
+            while parent[index] != index:
+                parent[index] = parent[parent[index]]
+                index = parent[index]
+            return index
+
+        if self.dedupe and len(texts) > 1:
+            signatures = [self.lsh.signature(shingles(text)) for text in texts]
+            for first, second in self.lsh.similar_pairs(signatures):
+                first_root, second_root = find(first), find(second)
+                if first_root != second_root:
+                    parent[max(first_root, second_root)] = min(first_root, second_root)
+        return [find(index) for index in range(len(texts))]
+
+    def prepare(self, texts):
+        """
+        Return (unique_texts, assignment): the texts to summarise, and for every input text the
+        index of the unique text whose summary it gets. The longest member represents a cluster.
+        """
+        original_tokens = sum(estimate_tokens(text) if isinstance(text, str) else 0 for text in texts)
+        cleaned = [self.clean(text) for text in texts]
+
+        members = defaultdict(list)
+        for index, cluster in enumerate(self.clusters(cleaned)):
+            members[cluster].append(index)
+
+        unique_texts, assignment = [], [0] * len(texts)
+        for cluster_members in members.values():
+            representative = max(cluster_members, key=lambda index: len(cleaned[index]))
+            for index in cluster_members:
+                assignment[index] = len(unique_texts)
+            unique_texts.append(cleaned[representative])
+
+        prepared_tokens = sum(estimate_tokens(text) for text in unique_texts)
+        self.stats = {
+            "articles": len(texts),
+            "calls": len(unique_texts),
+            "calls_saved": len(texts) - len(unique_texts),
+            "duplicate_clusters": sum(1 for cluster_members in members.values() if len(cluster_members) > 1),
+            "input_tokens_before": original_tokens,
+            "input_tokens_after": prepared_tokens,
+            "input_tokens_saved": original_tokens - prepared_tokens,
+        }
+        return unique_texts, assignment
+
+    def print_report(self):
+        stats = self.stats
+        if not stats.get("articles"):
+            return
+        print(f"Preprocessing: {stats['articles']} articles -> {stats['calls']} to summarise "
+              f"({stats['calls_saved']} calls saved, {stats['duplicate_clusters']} duplicate clusters), "
+              f"~{stats['input_tokens_before']} -> ~{stats['input_tokens_after']} input tokens "
+              f"({stats['input_tokens_saved'] / max(stats['input_tokens_before'], 1):.0%} saved)")
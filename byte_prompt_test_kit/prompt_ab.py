@@ -0,0 +1,210 @@
+"""
+A/B harness for summarisation prompts: runs N named prompt variants over one article set as a
+single job under one concurrency budget, reusing the summary cache, and writes a side-by-side
+table of summaries plus a latency/token/cost report per variant.
+
+    python prompt_ab.py --variant base="Index Bank" --variant pyramid=prompts/pyramid.txt
+    python prompt_ab.py --variant "Index Bank" --variant Payments --articles input_output/articles_input.parquet
+
+A variant is NAME=SOURCE, where SOURCE is a sector passed to get_summary_prompt or a text file
+holding the whole prompt; a bare sector is its own name.
+"""
+import argparse
+import asyncio
+import os
+from datetime import datetime
+
+import pandas as pd
+from dotenv import load_dotenv
+load_dotenv()
+
+from gemini_article_summarisation import GeminiArticleSummariser, create_genai_client
+from preprocessing import ArticlePreprocessor
+from results_store import read_articles
+from summary_cache import SummaryCache
+from summary_metrics import CallMetricsRecorder
+from summary_prompts import get_summary_prompt
+from summary_scheduler import SummaryScheduler
+
+
+PROJECT_ID = 'evident-data-dev'
+
+# USD per million tokens, list prices for prompts up to 200k tokens at the time of writing
+MODEL_PRICES = {
+    "google/gemini-2.5-pro": {"input": 1.25, "cached_input": 0.125, "output": 10.0},
+    "google/gemini-2.5-flash": {"input": 0.30, "cached_input": 0.03, "output": 2.50},
+}
+
+
+def load_variant(spec):
+    """'name=source' or 'source' -> (name, prompt), source being a prompt file or a sector."""
+    name, _, source = spec.partition("=")
+    if not source:
+        name, source = spec, spec
+    if os.path.isfile(source):
+        with open(source, encoding="utf-8") as prompt_file:
+            return name, prompt_file.read()
+    return name, get_summary_prompt(source)
+
+
+def estimate_cost(model_name, input_tokens, cached_tokens, output_tokens):
+    prices = MODEL_PRICES.get(model_name)
+    if prices is None:
+        return None
+    return ((input_tokens - cached_tokens) * prices["input"]
+            + cached_tokens * prices["cached_input"]
+            + output_tokens * prices["output"]) / 1e6
+
+
+class PromptABTest:
+    """
+    Summarise every article with every prompt variant. All variant x article calls go through
+    one SummaryScheduler, one genai client and one SummaryCache (whose key includes the prompt,
+    so variants never share entries but re-runs of a variant are free).
+    """
+    def __init__(self,
+                 variants,
+                 model_name="google/gemini-2.5-pro",
+                 genai_client=None,
+                 cache_path="summary_cache.sqlite",
+                 metrics_path="summary_metrics.jsonl",
+                 concurrency=8,
+                 requests_per_minute=60,
+                 max_retries=5,
+                 use_context_cache=True,
+                 preprocess=True,
+                 max_input_tokens=8000,
+                 dedupe_threshold=0.8):
+        # {name: prompt}
+        self.variants = dict(variants)
+        self.model_name = model_name
+        self.genai_client = genai_client
+        self.cache_path = cache_path
+        self.metrics_path = metrics_path
+        self.scheduler_config = dict(concurrency=concurrency,
+                                     requests_per_minute=requests_per_minute,
+                                     max_retries=max_retries)
+        self.use_context_cache = use_context_cache
+        # the same preprocessing as ByteSummarisation, so both send identical texts and share cached summaries
+        self.preprocessor = ArticlePreprocessor(max_input_tokens=max_input_tokens,
+                                                similarity_threshold=dedupe_threshold) if preprocess else None
+        self.cache_hits = {}
+        self.failures = {}
+        self.metrics = None
+
+    async def run(self, articles):
+        """Return a DataFrame with one summary_<variant> column per variant, in article order."""
+        genai_client = self.genai_client or create_genai_client(PROJECT_ID)
+        cache = SummaryCache(self.cache_path) if self.cache_path else None
+        self.metrics = CallMetricsRecorder(self.metrics_path)
+        summarisers = {name: GeminiArticleSummariser(summarisation_prompt=prompt,
+                                                     model_name=self.model_name,
+                                                     client=genai_client,
+                                                     cache=cache,
+                                                     metrics=self.metrics,
+                                                     metrics_labels={"variant": name},
+                                                     use_context_cache=self.use_context_cache)
+                       for name, prompt in self.variants.items()}
+
+        try:
+            texts = list(articles.body.values)
+            # near-duplicates are summarised once per variant and fanned out by assignment
+            if self.preprocessor is not None:
+                texts, assignment = self.preprocessor.prepare(texts)
+                self.preprocessor.print_report()
+            else:
+                assignment = list(range(len(texts)))
+            summaries = {name: [summariser.cached_summary(text) for text in texts]
+                         for name, summariser in summarisers.items()}
+            self.cache_hits = {name: sum(summary is not None for summary in variant_summaries)
+                               for name, variant_summaries in summaries.items()}
+            to_summarise = [(name, i) for name, variant_summaries in summaries.items()
+                            for i, summary in enumerate(variant_summaries) if summary is None]
+            print(f"{len(self.variants)} variants x {len(texts)} unique articles: "
+                  f"{sum(self.cache_hits.values())} cached, {len(to_summarise)} to summarise")
+
+            scheduler = SummaryScheduler(**self.scheduler_config)
+            new_summaries, failures = await scheduler.run(
+                to_summarise,
+                lambda item: summarisers[item[0]].request_summary(texts[item[1]], check_cache=False),
+                estimate_tokens=lambda item: (len(self.variants[item[0]]) + len(str(texts[item[1]]))) // 4,
+                label="variant summaries",
+            )
+            for (name, i), summary in zip(to_summarise, new_summaries):
+                summaries[name][i] = summary
+            self.failures = {to_summarise[index]: error for index, error in failures.items()}
+            summaries = {name: [variant_summaries[unique_index] for unique_index in assignment]
+                         for name, variant_summaries in summaries.items()}
+        finally:
+            # context caches are billed until deleted, so clean up even when a run fails
+            for summariser in summarisers.values():
+                await summariser.delete_context_cache()
+            self.metrics.close()
+            if cache is not None:
+                cache.print_stats()
+                cache.close()
+
+        side_by_side = articles[[column for column in ("url", "title") if column in articles.columns]].copy()
+        for name, variant_summaries in summaries.items():
+            side_by_side[f"summary_{name}"] = [summarisers[name].clean_summary(summary) if summary else None
+                                               for summary in variant_summaries]
+        return side_by_side
+
+    def report(self, side_by_side):
+        """One row per variant: calls, cache hits, failures, latency, tokens, estimated cost and summary length."""
+        metrics = self.metrics.summary(group_by="variant")
+        rows = []
+        for name in self.variants:
+            variant_metrics = metrics.get(name, {})
+            summaries = side_by_side[f"summary_{name}"].dropna()
+            input_tokens = variant_metrics.get("input_tokens", 0)
+            cached_tokens = variant_metrics.get("cached_tokens", 0)
+            output_tokens = variant_metrics.get("output_tokens", 0)
+            rows.append({
+                "variant": name,
+                "prompt_chars": len(self.variants[name]),
+                "summaries": len(summaries),
+                "cache_hits": self.cache_hits.get(name, 0),
+                "api_calls": variant_metrics.get("calls", 0),
+                "retries": variant_metrics.get("retries", 0),
+                "failed": sum(1 for failed_name, _ in self.failures if failed_name == name),
+                "latency_mean": variant_metrics.get("latency_mean"),
+                "latency_p95": variant_metrics.get("latency_p95"),
+                "input_tokens": input_tokens,
+                "cached_tokens": cached_tokens,
+                "output_tokens": output_tokens,
+                "estimated_cost_usd": estimate_cost(self.model_name, input_tokens, cached_tokens, output_tokens),
+                "mean_summary_chars": summaries.str.len().mean(),
+                "mean_bullets": summaries.str.count("•").mean(),
+            })
+        return pd.DataFrame(rows)
+
+
+def main(variant_specs, articles_path="input_output/articles_input.xlsx", output_path=None, **ab_config):
+    articles = read_articles(articles_path)
+    ab_test = PromptABTest([load_variant(spec) for spec in variant_specs], **ab_config)
+    side_by_side = asyncio.run(ab_test.run(articles))
+    report = ab_test.report(side_by_side)
+    print(report.to_string(index=False))
+
+    output_path = output_path or f"input_output/prompt_ab_{datetime.now().strftime('%b%d_%H%M').lower()}.xlsx"
+    with pd.ExcelWriter(output_path) as writer:
+        side_by_side.to_excel(writer, sheet_name="summaries", index=False)
+        report.to_excel(writer, sheet_name="report", index=False)
+    print(f"Wrote {output_path}")
+    return side_by_side, report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare summarisation prompt variants on one article set.")
+    parser.add_argument("--variant", action="append", required=True,
+                        help="NAME=SECTOR, NAME=prompt_file.txt or a bare sector; repeat for each variant")
+    parser.add_argument("--articles", default="input_output/articles_input.xlsx")
+    parser.add_argument("--output", default=None, help="Excel file for the side-by-side table and report")
+    parser.add_argument("--model", default="google/gemini-2.5-pro")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests-per-minute", type=int, default=60)
+    args = parser.parse_args()
+
+    main(args.variant, args.articles, args.output,
+         model_name=args.model, concurrency=args.concurrency, requests_per_minute=args.requests_per_minute)
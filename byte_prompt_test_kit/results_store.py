@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import time
+
+import pandas as pd
+
+
+ARTICLE_COLUMNS = ["url", "title", "body", "source_name", "date_published", "pillar"]
+OUTPUT_COLUMNS = ARTICLE_COLUMNS + ["summary", "summary_error"]
+
+
+def read_articles(path):
+    """
+    Read the input articles from .xlsx, .csv, .parquet or .feather. The columnar formats skip
+    openpyxl entirely, which is most of the start-up time on big sheets.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".xlsx", ".xls"):
+        articles = pd.read_excel(path, dtype={"date_published": str})
+    elif extension == ".csv":
+        articles = pd.read_csv(path, dtype={"date_published": str})
+    elif extension == ".parquet":
+        articles = pd.read_parquet(path)
+    elif extension == ".feather":
+        articles = pd.read_feather(path)
+    else:
+        raise ValueError(f"Unsupported article input format: {path}")
+    if "date_published" in articles.columns:
+        # dates as strings like the Excel path; missing dates stay None rather than 'nan' / 'NaT'
+        dates = articles["date_published"]
+        articles["date_published"] = pd.Series([None if pd.isna(date) else str(date) for date in dates],
+                                               index=articles.index, dtype=object)
+    return articles
+
+
+def article_key(url, body):
+    """Stable id of an input row, used to skip rows that are already done when resuming."""
+    return hashlib.sha256(f"{url}\0{body}".encode("utf-8")).hexdigest()[:32]
+
+
+def article_keys(articles):
+    urls = articles["url"] if "url" in articles.columns else [""] * len(articles)
+    return [article_key(url, body) for url, body in zip(urls, articles["body"])]
+
+
+class ResultsStore:
+    """
+    Append-only JSONL file of summaries, one line written (and flushed) as each article completes,
+    so a crash or quota error part way through keeps every finished call.
+
+    With resume=True an existing file is kept and done_keys() tells the caller which rows to
+    skip; otherwise the file is started afresh.
+    """
+    def __init__(self, path, resume=False):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if resume:
+            self.repair_last_line()
+        self.file = open(path, "a" if resume else "w", encoding="utf-8")
+
+    def repair_last_line(self):
+        """
+        Make sure an existing file ends with a newline before appending to it. A crash mid-write
+        leaves a partial record, which is cut off; a complete record missing only its newline gets one.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r+b") as results_file:
+            size = results_file.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            # read back in blocks until the last newline, the partial line is rarely longer than one record
+            position = size
+            tail = b""
+            while position > 0 and b"\n" not in tail:
+                block = min(65536, position)
+                position -= block
+                results_file.seek(position)
+                tail = results_file.read(block) + tail
+            if tail.endswith(b"\n"):
+                return
+            line_start = position + tail.rfind(b"\n") + 1
+            results_file.seek(line_start)
+            try:
+                json.loads(results_file.read().decode("utf-8"))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                results_file.truncate(line_start)
+            else:
+                results_file.write(b"\n")
+
+    def append(self, key, sector, summary, error=None, **extra):
+        record = {"article_key": key,
+                  "sector": sector,
+                  "summary": summary,
+                  "summary_error": None if error is None else str(error),
+                  "completed_at": time.time(),
+                  **extra}
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def load(self, sector=None):
+        """Latest record per (sector, article_key) as a DataFrame, ignoring a truncated last line."""
+        records = []
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as results_file:
+                for line in results_file:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+        results = pd.DataFrame(records, columns=["article_key", "sector", "summary", "summary_error", "completed_at"])
+        if sector is not None:
+            results = results[results["sector"] == sector]
+        return results.drop_duplicates(["sector", "article_key"], keep="last")
+
+    def done_keys(self, sector):
+        """Article keys that already have a summary for this sector; failed rows are retried."""
+        results = self.load(sector)
+        return set(results.loc[results["summary"].notna(), "article_key"])
+
+    def merge(self, articles, sector):
+        """The articles with their stored summary and error columns, in input order."""
+        results = self.load(sector)[["article_key", "summary", "summary_error"]]
+        articles = articles.drop(columns=["summary", "summary_error"], errors="ignore")
+        articles = articles.assign(article_key=article_keys(articles))
+        merged = articles.merge(results, on="article_key", how="left")
+        return merged.drop(columns="article_key")
+
+    def to_parquet(self, path, sector=None):
+        self.load(sector).to_parquet(path, index=False)
+
+    def close(self):
+        self.file.close()
@@ -1,24 +1,67 @@
 from byte_summarisation import ByteSummarisation
-import pandas as pd
+from gemini_article_summarisation import create_genai_client
+from results_store import read_articles
+from summary_scheduler import SummaryScheduler
+import argparse
+import asyncio
+import time
 from datetime import datetime
 
-def run_byte_workflow(sector):
-    workflow = ByteSummarisation(sector=sector,
-                            test_run=False, 
-                            )
-    
-    articles = workflow.trigger_workflow()
-    return articles
-
-def main():
-    sectors = ["Index Bank"] 
-    
-    for sector in sectors:
-        articles = run_byte_workflow(sector=sector)
-        
-        # outputting to local file rather than to BQ
-        timestamp = datetime.now().strftime("%b%d_%H%M").lower()
-        articles.to_excel(f"input_output/articles_output_{timestamp}.xlsx", index=False)
+PROJECT_ID = 'evident-data-dev'
+
+def results_path_for(sector):
+    return f"input_output/results_{sector.lower().replace(' ', '_')}.jsonl"
+
+async def run_sectors(sectors, articles, resume=False, genai_client=None, concurrency=8, requests_per_minute=60):
+    """
+    Summarise the same articles for every sector concurrently on one event loop.
+    All sectors share one genai client and one scheduler, so concurrency and the requests per
+    minute budget are global rather than per sector. Returns {sector: DataFrame or exception}.
+    """
+    genai_client = genai_client or create_genai_client(PROJECT_ID)
+    scheduler = SummaryScheduler(concurrency=concurrency, requests_per_minute=requests_per_minute)
+    workflows = [ByteSummarisation(sector=sector, genai_client=genai_client, scheduler=scheduler) for sector in sectors]
+
+    start_time = time.monotonic()
+    outputs = await asyncio.gather(*[workflow.run_workflow(articles,
+                                                           results_path=results_path_for(workflow.sector),
+                                                           resume=resume)
+                                     for workflow in workflows],
+                                   return_exceptions=True)
+    print(f"Summarised {len(sectors)} sectors in {time.monotonic() - start_time:.1f}s")
+    return dict(zip(sectors, outputs))
+
+def main(sectors=("Index Bank",), input_path="input_output/articles_input.xlsx", resume=False, excel=True, parquet=False,
+         concurrency=8, requests_per_minute=60):
+    # the input is read once and shared by every sector
+    articles = read_articles(input_path)
+    outputs = asyncio.run(run_sectors(list(sectors), articles, resume=resume,
+                                      concurrency=concurrency, requests_per_minute=requests_per_minute))
+
+    # outputting to local file rather than to BQ
+    timestamp = datetime.now().strftime("%b%d_%H%M").lower()
+    for sector, articles in outputs.items():
+        if isinstance(articles, Exception):
+            print(f"{sector} failed: {articles}")
+            continue
+        output_path = f"input_output/articles_output_{timestamp}_{sector.lower().replace(' ', '_')}"
+        if parquet:
+            articles.to_parquet(f"{output_path}.parquet", index=False)
+        if excel:
+            articles.to_excel(f"{output_path}.xlsx", index=False)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Summarise the test articles for each sector.")
+    parser.add_argument("--sectors", nargs="+", default=["Index Bank"],
+                        help='e.g. --sectors "Index Bank" Insurance1000 Payments')
+    parser.add_argument("--input", default="input_output/articles_input.xlsx",
+                        help="articles as .xlsx, .csv, .parquet or .feather")
+    parser.add_argument("--resume", action="store_true", help="skip articles already summarised in the results file")
+    parser.add_argument("--no-excel", action="store_true", help="skip the final Excel export")
+    parser.add_argument("--parquet", action="store_true", help="also export the final output as Parquet")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent requests across all sectors")
+    parser.add_argument("--requests-per-minute", type=int, default=60, help="request budget across all sectors")
+    args = parser.parse_args()
+
+    main(args.sectors, args.input, resume=args.resume, excel=not args.no_excel, parquet=args.parquet,
+         concurrency=args.concurrency, requests_per_minute=args.requests_per_minute)
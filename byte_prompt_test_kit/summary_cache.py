@@ -0,0 +1,104 @@
+import hashlib
+import json
+import sqlite3
+import time
+
+
+DEFAULT_CACHE_PATH = "summary_cache.sqlite"
+
+
+def summary_cache_key(model_name, system_prompt, user_template, generation_config, article_text):
+    """
+    Content address of a summary: a SHA-256 over everything that changes the model's output.
+    generation_config should be a JSON-serialisable dict.
+    """
+    payload = json.dumps({
+        "model_name": model_name,
+        "system_prompt": system_prompt,
+        "user_template": user_template,
+        "generation_config": generation_config,
+        "article_text": article_text,
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """
+    Persistent SQLite cache of Gemini summaries keyed by summary_cache_key.
+
+    Entries older than max_age_days are ignored and evicted, and once there are more than
+    max_entries the least recently used ones are dropped. With bypass=True lookups always
+    miss but fresh summaries are still stored, which refreshes the cache.
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=100000, max_age_days=90, bypass=False):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_days * 24 * 3600 if max_age_days else None
+        self.bypass = bypass
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS summaries (
+                cache_key TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                model_name TEXT,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS summaries_last_accessed ON summaries (last_accessed)")
+        self.conn.commit()
+
+    def get(self, cache_key):
+        if self.bypass:
+            self.stats["misses"] += 1
+            return None
+        row = self.conn.execute(
+            "SELECT summary, created_at FROM summaries WHERE cache_key = ?", (cache_key,)
+        ).fetchone()
+        now = time.time()
+        if row is None or (self.max_age_seconds and now - row[1] > self.max_age_seconds):
+            self.stats["misses"] += 1
+            return None
+        self.conn.execute("UPDATE summaries SET last_accessed = ? WHERE cache_key = ?", (now, cache_key))
+        self.conn.commit()
+        self.stats["hits"] += 1
+        return row[0]
+
+    def put(self, cache_key, summary, model_name=None):
+        if summary is None:
+            return
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO summaries (cache_key, summary, model_name, created_at, last_accessed) VALUES (?, ?, ?, ?, ?)",
+            (cache_key, summary, model_name, now, now)
+        )
+        self.conn.commit()
+        self.stats["writes"] += 1
+
+    def evict(self):
+        """Drop expired entries and the least recently used ones above max_entries."""
+        evicted = 0
+        if self.max_age_seconds:
+            evicted += self.conn.execute(
+                "DELETE FROM summaries WHERE created_at < ?", (time.time() - self.max_age_seconds,)
+            ).rowcount
+        if self.max_entries:
+            evicted += self.conn.execute("""
+                DELETE FROM summaries WHERE cache_key IN (
+                    SELECT cache_key FROM summaries ORDER BY last_accessed DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,)).rowcount
+        self.conn.commit()
+        self.stats["evictions"] += evicted
+        return evicted
+
+    def print_stats(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        hit_rate = self.stats["hits"] / lookups if lookups else 0.0
+        print(f"Summary cache: {self.stats['hits']} hits, {self.stats['misses']} misses ({hit_rate:.0%} hit rate), "
+              f"{self.stats['writes']} writes, {self.stats['evictions']} evictions")
+
+    def close(self):
+        self.evict()
+        self.conn.close()
@@ -0,0 +1,79 @@
+import json
+import time
+from collections import Counter, defaultdict
+
+
+class CallMetricsRecorder:
+    """
+    Structured per-call metrics for the summariser: one record per Gemini call attempt with
+    model, latency, input/output/cached token counts, attempt number and status.
+    Records are appended to a JSONL file (if path is set) as they happen and kept in memory
+    for the run summary.
+    """
+    def __init__(self, path=None, run_id=None):
+        self.path = path
+        self.run_id = run_id or time.strftime("%Y%m%d_%H%M%S")
+        self.records = []
+        self.attempts = Counter()
+        self.file = open(path, "a", encoding="utf-8") if path else None
+
+    def record(self, request_key, model_name, status, latency=None, usage_metadata=None, error=None, **extra):
+        """Record one call; the attempt number is counted per request_key within the run."""
+        record = {
+            "run_id": self.run_id,
+            "timestamp": time.time(),
+            "request_key": request_key,
+            "model": model_name,
+            "status": status,
+            "attempt": self.attempts[request_key],
+            "latency_seconds": None if latency is None else round(latency, 3),
+            "input_tokens": getattr(usage_metadata, "prompt_token_count", None),
+            "output_tokens": getattr(usage_metadata, "candidates_token_count", None),
+            "cached_tokens": getattr(usage_metadata, "cached_content_token_count", None),
+            "error": None if error is None else str(error),
+            **extra,
+        }
+        self.attempts[request_key] += 1
+        self.records.append(record)
+        if self.file:
+            self.file.write(json.dumps(record) + "\n")
+            self.file.flush()
+        return record
+
+    def summary(self, group_by=None):
+        """Aggregate the run's records, overall or per value of the group_by field."""
+        groups = defaultdict(list)
+        for record in self.records:
+            groups[record.get(group_by) if group_by else "all"].append(record)
+
+        summaries = {}
+        for group, records in groups.items():
+            ok = [record for record in records if record["status"] == "ok"]
+            latencies = sorted(record["latency_seconds"] for record in ok if record["latency_seconds"] is not None) or [0.0]
+            input_tokens = sum(record["input_tokens"] or 0 for record in ok)
+            cached_tokens = sum(record["cached_tokens"] or 0 for record in ok)
+            summaries[group] = {
+                "calls": len(records),
+                "ok": len(ok),
+                "errors": sum(1 for record in records if record["status"] == "error"),
+                "retries": sum(1 for record in records if record["attempt"] > 0),
+                "input_tokens": input_tokens,
+                "output_tokens": sum(record["output_tokens"] or 0 for record in ok),
+                "cached_tokens": cached_tokens,
+                "cached_token_share": round(cached_tokens / input_tokens, 3) if input_tokens else 0.0,
+                "latency_mean": round(sum(latencies) / len(latencies), 3),
+                "latency_p50": latencies[len(latencies) // 2],
+                "latency_p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            }
+        return summaries
+
+    def print_summary(self, group_by=None):
+        for group, summary in self.summary(group_by).items():
+            print(f"[{group}] {summary['ok']}/{summary['calls']} calls ok, {summary['retries']} retries, "
+                  f"{summary['input_tokens']} input tokens ({summary['cached_token_share']:.0%} cached), "
+                  f"{summary['output_tokens']} output tokens, latency mean {summary['latency_mean']}s "
+                  f"/ p95 {summary['latency_p95']}s")
+
+    def close(self):
+        if self.file:
+            self.file.close()
@@ -0,0 +1,117 @@
+import asyncio
+import random
+import time
+
+from google.genai import errors
+
+
+# API error codes worth retrying: quota exhausted and transient server errors
+RETRYABLE_CODES = {429, 500, 502, 503, 504}
+
+
+def is_retryable(error):
+    if isinstance(error, errors.APIError):
+        return error.code in RETRYABLE_CODES
+    return isinstance(error, (asyncio.TimeoutError, ConnectionError))
+
+
+class MinuteBudget:
+    """
+    Token bucket refilled continuously at `per_minute` units per minute, allowing bursts of up to
+    a minute's worth. Used for both requests per minute and (estimated) tokens per minute.
+    """
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self.available = float(per_minute)
+        self.last_refill = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, amount=1):
+        # a single request larger than the whole budget would otherwise wait forever
+        amount = min(amount, self.per_minute)
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.available = min(self.per_minute, self.available + (now - self.last_refill) * self.per_minute / 60)
+                self.last_refill = now
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                await asyncio.sleep((amount - self.available) * 60 / self.per_minute)
+
+
+class SummaryScheduler:
+    """
+    Runs one async call per item with bounded concurrency, a requests/tokens per minute budget
+    and retries with jittered exponential backoff on quota and server errors.
+    Results come back in input order; items that still fail are None and listed in the failures.
+    """
+    def __init__(self,
+                 concurrency=8,
+                 requests_per_minute=60,
+                 tokens_per_minute=None,
+                 max_retries=5,
+                 base_delay=2.0,
+                 max_delay=60.0):
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.request_budget = MinuteBudget(requests_per_minute) if requests_per_minute else None
+        self.token_budget = MinuteBudget(tokens_per_minute) if tokens_per_minute else None
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def call_with_retries(self, worker, item, estimated_tokens=0):
+        """Await worker(item) under the concurrency limit and budgets, retrying retryable errors."""
+        for attempt in range(self.max_retries + 1):
+            async with self.semaphore:
+                if self.request_budget:
+                    await self.request_budget.acquire(1)
+                if self.token_budget and estimated_tokens:
+                    await self.token_budget.acquire(estimated_tokens)
+                try:
+                    return await worker(item)
+                except Exception as e:
+                    if not is_retryable(e) or attempt == self.max_retries:
+                        raise
+                    delay = self.backoff(attempt)
+                    print(f"Retryable error ({e}), retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})")
+            # sleep outside the semaphore so the slot can be used by other calls
+            await asyncio.sleep(delay)
+
+    async def run(self, items, worker, estimate_tokens=None, label="summaries", on_result=None):
+        """
+        Call worker(item) for every item and return (results, failures) where results is in
+        input order and failures maps item index to the exception that was finally raised.
+        on_result(index, result, error) is called as each item finishes, e.g. to stream results to disk.
+        """
+        items = list(items)
+        results = [None] * len(items)
+        failures = {}
+        completed = 0
+        start_time = time.monotonic()
+        progress_step = max(1, len(items) // 20)
+
+        async def run_one(index, item):
+            nonlocal completed
+            estimated_tokens = estimate_tokens(item) if estimate_tokens else 0
+            try:
+                results[index] = await self.call_with_retries(worker, item, estimated_tokens)
+            except Exception as e:
+                print(f"Failed item {index} of {label}: {e}")
+                failures[index] = e
+            if on_result is not None:
+                on_result(index, results[index], failures.get(index))
+            completed += 1
+            if completed % progress_step == 0 or completed == len(items):
+                print(f"Progress: {completed}/{len(items)} {label} ({completed / len(items):.0%}) "
+                      f"in {time.monotonic() - start_time:.0f}s")
+
+        await asyncio.gather(*[run_one(index, item) for index, item in enumerate(items)])
+
+        print(f"Completed {len(items) - len(failures)}/{len(items)} {label} in "
+              f"{time.monotonic() - start_time:.1f}s, {len(failures)} failed")
+        return results, failures
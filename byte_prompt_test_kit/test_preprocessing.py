@@ -0,0 +1,42 @@
+import pytest
+
+from preprocessing import strip_boilerplate
+
+
+@pytest.mark.parametrize("line", [
+    "Advertisement",
+    "Sign up for our free newsletter today",
+    "Click here",
+    "Click here to read the full report",
+    "Read more: Bank results beat forecasts",
+    "© 2024 Reuters",
+    "Copyright 2023-2024 Bloomberg L.P.",
+    "© Reuters. All rights reserved.",
+    "All rights reserved.",
+    "Reporting by Jane Smith in London; Editing by Tom Brown",
+    "Additional reporting by Ana Lopez, Raj Patel and Li Wei",
+    "Photo: Getty Images",
+    "Image credit: Reuters/Dado Ruvic",
+    "We use cookies to improve your experience",
+])
+def test_boilerplate_lines_are_dropped(line):
+    assert strip_boilerplate(f"The bank cut its costs.\n{line}\nProfits rose.") == "The bank cut its costs.\nProfits rose."
+
+
+@pytest.mark.parametrize("line", [
+    "Copyright infringement claims against the bank rose sharply last year.",
+    "Copyright law is being rewritten to cover AI training data, the minister said.",
+    "Click here and there, the new app lets customers move money in seconds.",
+    "Tap here to pay has become the default for most card transactions, the survey found.",
+    "Reporting by the Financial Times showed the lender had missed its targets.",
+    "Reporting by Reuters showed the deal was close.",
+    "Photographs of the new headquarters were released on Monday.",
+    "Image quality was a focus of the new phone, the company said.",
+    "Photo: the chief executive said the image of the bank had to change after years of losses "
+    "and fines, adding that the turnaround plan would take at least three years to deliver in full, "
+    "with cost cuts coming first.",
+    "The company said all rights reserved under the old agreement would pass to the buyer.",
+])
+def test_article_sentences_survive(line):
+    text = f"The bank cut its costs.\n{line}\nProfits rose."
+    assert strip_boilerplate(text) == text
@@ -0,0 +1,51 @@
+import json
+
+from results_store import ResultsStore
+
+
+def write_records(path, count):
+    store = ResultsStore(str(path))
+    for i in range(count):
+        store.append(f"key{i}", "Payments", f"summary {i}")
+    store.close()
+
+
+def test_resume_after_truncated_write(tmp_path):
+    path = tmp_path / "results.jsonl"
+    write_records(path, 3)
+    # simulate a crash half way through writing the last record
+    content = path.read_bytes()
+    path.write_bytes(content[:-20])
+
+    store = ResultsStore(str(path), resume=True)
+    store.append("key2", "Payments", "summary 2 again")
+    store.append("key3", "Payments", "summary 3")
+    store.close()
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["article_key"] for line in lines] == ["key0", "key1", "key2", "key3"]
+    assert ResultsStore(str(path), resume=True).done_keys("Payments") == {"key0", "key1", "key2", "key3"}
+
+
+def test_resume_adds_missing_newline(tmp_path):
+    path = tmp_path / "results.jsonl"
+    write_records(path, 2)
+    path.write_bytes(path.read_bytes().rstrip(b"\n"))
+
+    store = ResultsStore(str(path), resume=True)
+    store.append("key2", "Payments", "summary 2")
+    store.close()
+
+    keys = [json.loads(line)["article_key"] for line in path.read_text(encoding="utf-8").splitlines()]
+    assert keys == ["key0", "key1", "key2"]
+
+
+def test_resume_truncated_only_line(tmp_path):
+    path = tmp_path / "results.jsonl"
+    path.write_text('{"article_key": "key0", "sec', encoding="utf-8")
+
+    store = ResultsStore(str(path), resume=True)
+    store.append("key0", "Payments", "summary 0")
+    store.close()
+
+    assert [json.loads(line)["article_key"] for line in path.read_text(encoding="utf-8").splitlines()] == ["key0"]
@@ -0,0 +1,238 @@
+"""
+Local benchmarks for the MarketScreener events pipeline.
+Nothing here touches MarketScreener or BigQuery; run e.g. `python benchmarks.py rate_limit`
+or `python benchmarks.py parse --pages-dir saved_pages --pages 3000`.
+"""
+import argparse
+import asyncio
+import glob
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from random import randint
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+import aiohttp
+from aiohttp import web
+
+from date_scraper import clean_event, events_to_frame, fetch_marketscreener_urls, parse_events
+from page_cache import PageCache, content_hash
+from post_processing import EVENT_NAME_REPLACEMENTS, EVENTS_TO_FILTER_KWS, curate_events
+from rate_limit import AdaptiveRateLimiter
+
+
+SAMPLE_PAGE = """<html><body><div id="header">{padding}</div>
+<div id="next-events-card"><table>
+<tr><td>12/05/2025\n\n</td><td>Q1 2025 Earnings Release</td></tr>
+<tr><td>20/06/2025\n\n</td><td>Ex-dividend day for final dividend</td></tr>
+</table></div></body></html>"""
+
+
+async def start_rate_limited_server(port, max_rate, latency, validators=True):
+    """
+    Local stand-in for MarketScreener that answers 429 once more than max_rate requests/s arrive.
+    With validators, pages carry an ETag and Last-Modified and a matching If-None-Match or
+    If-Modified-Since gets a 304; without, every request gets the full (unchanged) page.
+    """
+    state = {"tokens": float(max_rate), "last": time.monotonic()}
+    page = SAMPLE_PAGE.format(padding="x" * 50000)
+    page_validators = {"ETag": f'"{content_hash(page)[:16]}"',
+                       "Last-Modified": "Mon, 12 May 2025 08:00:00 GMT"} if validators else {}
+
+    async def handler(request):
+        now = time.monotonic()
+        state["tokens"] = min(float(max_rate), state["tokens"] + (now - state["last"]) * max_rate)
+        state["last"] = now
+        if state["tokens"] < 1:
+            return web.Response(status=429, headers={"Retry-After": "1"})
+        state["tokens"] -= 1
+        await asyncio.sleep(latency)
+        if validators and (request.headers.get("If-None-Match") == page_validators["ETag"]
+                           or request.headers.get("If-Modified-Since") == page_validators["Last-Modified"]):
+            return web.Response(status=304, headers=page_validators)
+        return web.Response(text=page, content_type="text/html", headers=page_validators)
+
+    app = web.Application()
+    app.router.add_get("/{company}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+async def legacy_fetch(urls):
+    """The previous scheduler: a random 1-3s sleep inside a 10-slot semaphore and no retries."""
+    semaphore = asyncio.Semaphore(10)
+    ok = 0
+
+    async def fetch(session, url):
+        nonlocal ok
+        async with semaphore:
+            await asyncio.sleep(randint(1, 3))
+            async with session.get(url, timeout=30) as response:
+                if response.status == 200:
+                    parse_events(await response.text())
+                    ok += 1
+
+    connector = aiohttp.TCPConnector(limit=10, limit_per_host=5)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*[fetch(session, url) for url in urls])
+    return ok
+
+
+async def bench_rate_limit(pages=300, max_rate=40, latency=0.05, port=8765):
+    runner = await start_rate_limited_server(port, max_rate, latency)
+    urls = [f"http://127.0.0.1:{port}/company-{i}" for i in range(pages)]
+    try:
+        start = time.monotonic()
+        ok = await legacy_fetch(urls)
+        legacy_seconds = time.monotonic() - start
+        print(f"legacy: {ok}/{pages} pages in {legacy_seconds:.1f}s ({pages / legacy_seconds:.1f} pages/s)")
+
+        # let the server's bucket refill before the second run
+        await asyncio.sleep(1)
+        start = time.monotonic()
+        await fetch_marketscreener_urls(urls, limiter=AdaptiveRateLimiter(initial_rate=5.0))
+        adaptive_seconds = time.monotonic() - start
+        print(f"adaptive: {pages} pages in {adaptive_seconds:.1f}s ({pages / adaptive_seconds:.1f} pages/s), "
+              f"server limit {max_rate} req/s")
+    finally:
+        await runner.cleanup()
+
+
+async def bench_page_cache(pages=200, latency=0.05, port=8766):
+    """
+    Scrape the same pages twice through one PageCache and check the second run parses nothing:
+    against a server with validators every page comes back 304, without them every page has
+    an unchanged content hash.
+    """
+    urls = [f"http://127.0.0.1:{port}/company-{i}" for i in range(pages)]
+    for validators in (True, False):
+        runner = await start_rate_limited_server(port, max_rate=1000, latency=latency, validators=validators)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            page_cache = PageCache(os.path.join(cache_dir, "page_cache.sqlite"))
+            try:
+                for run in ("first", "second"):
+                    page_cache.stats = {"not_modified": 0, "same_hash": 0, "parsed": 0}
+                    start = time.monotonic()
+                    events = await fetch_marketscreener_urls(urls, page_cache=page_cache,
+                                                             limiter=AdaptiveRateLimiter(initial_rate=50.0))
+                    print(f"validators={validators}, {run} run: {len(events)} events in "
+                          f"{time.monotonic() - start:.1f}s, {page_cache.stats}")
+                expected = "not_modified" if validators else "same_hash"
+                assert page_cache.stats[expected] == pages and page_cache.stats["parsed"] == 0, \
+                    f"second run should serve every page as {expected}, got {page_cache.stats}"
+            finally:
+                page_cache.close()
+                await runner.cleanup()
+
+
+def legacy_parse(url, html_content):
+    """The previous parsing path: full html.parser tree and one DataFrame per URL."""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    events_card = soup.find("div", {"id": "next-events-card"})
+    if events_card:
+        clean_events = [clean_event(event.text) for event in events_card.find_all('tr')]
+        dates = [x.split('\n\n')[0].split('\n')[0] for x in clean_events]
+        event_names = [x.split('\n\n')[1] for x in clean_events]
+    else:
+        dates, event_names = [], []
+    return pd.DataFrame({'url': url, 'date': dates, 'event': event_names})
+
+
+def load_pages(pages_dir=None, count=2000):
+    """Saved calendar pages from pages_dir (*.html), or count synthetic pages of similar size."""
+    if pages_dir:
+        pages = []
+        for path in sorted(glob.glob(f"{pages_dir}/*.html")):
+            with open(path, encoding="utf-8") as page_file:
+                pages.append(page_file.read())
+        return pages
+    padding = "".join(f"<div class='row'><a href='/news/{i}'>Headline {i}</a><span>{i}</span></div>" for i in range(1500))
+    return [SAMPLE_PAGE.format(padding=padding)] * count
+
+
+def _run_parse_variant(variant, pages, workers, results):
+    start = time.monotonic()
+    urls = [f"page-{i}" for i in range(len(pages))]
+    if variant == "legacy":
+        frame = pd.concat([legacy_parse(url, page) for url, page in zip(urls, pages)])
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parsed = executor.map(parse_events, pages, chunksize=32)
+            frame = events_to_frame([[(url, date, event) for date, event in events]
+                                     for url, events in zip(urls, parsed)])
+    elapsed = time.monotonic() - start
+    # ru_maxrss is in kilobytes on Linux
+    peak_rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                   resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    results.put((variant, len(frame), elapsed, peak_rss / 1024))
+
+
+def bench_parse(pages_dir=None, count=2000, workers=4):
+    """Compare pages/s and peak RSS of the old and new parsing paths, each in a fresh process."""
+    pages = load_pages(pages_dir, count)
+    results = multiprocessing.Queue()
+    for variant in ("legacy", "strained_pool"):
+        process = multiprocessing.Process(target=_run_parse_variant, args=(variant, pages, workers, results))
+        process.start()
+        variant, rows, elapsed, peak_rss_mb = results.get()
+        process.join()
+        print(f"{variant}: {len(pages)} pages, {rows} events in {elapsed:.1f}s "
+              f"({len(pages) / elapsed:.0f} pages/s), peak RSS {peak_rss_mb:.0f} MB")
+
+
+def legacy_curate(raw_events):
+    """The previous cleaning path: row-wise apply and a tag list per row, as dolly.keywords_over_text built."""
+    def clean_name(event_name):
+        for old, new in EVENT_NAME_REPLACEMENTS:
+            event_name = event_name.replace(old, new)
+        return event_name.strip()
+
+    def tags(text):
+        return [tag for tag, kws in EVENTS_TO_FILTER_KWS.items() for kw in kws if kw.lower() in text.lower()]
+
+    df = raw_events.copy()
+    df['event'] = df['event'].apply(clean_name)
+    df['not_interesting'] = df['event'].apply(tags)
+    df = df[df.not_interesting.apply(lambda x: len(x) == 0)]
+    return df[['date', 'event', 'name']].reset_index(drop=True)
+
+
+def bench_clean(rows=500000):
+    """Time the legacy and vectorised cleaning on a synthetic raw events frame."""
+    templates = ["Q{} 2025 Earnings Release", "Ex-dividend day for final dividend", "Annual General Meeting",
+                 "Q{} 2025 Sales (Projected)", "Détachement du coupon", "Pre-market Q{} Earnings Release"]
+    raw_events = pd.DataFrame({
+        'name': [f"Company {i % 1000}" for i in range(rows)],
+        'date': ["2025/05/12"] * rows,
+        'company_id': [i % 1000 for i in range(rows)],
+        'event': [templates[i % len(templates)].format(i % 4 + 1) for i in range(rows)],
+    })
+    for name, curate in (("legacy", legacy_curate), ("vectorised", curate_events)):
+        start = time.monotonic()
+        curated = curate(raw_events)
+        print(f"{name}: {rows} events -> {len(curated)} in {(time.monotonic() - start) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("benchmark", choices=["rate_limit", "page_cache", "parse", "clean"])
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--pages-dir", help="directory of saved calendar pages (*.html) for the parse benchmark")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    if args.benchmark == "rate_limit":
+        asyncio.run(bench_rate_limit(pages=args.pages))
+    elif args.benchmark == "page_cache":
+        asyncio.run(bench_page_cache(pages=args.pages))
+    elif args.benchmark == "parse":
+        bench_parse(pages_dir=args.pages_dir, count=args.pages, workers=args.workers)
+    elif args.benchmark == "clean":
+        bench_clean()
@@ -1,7 +1,6 @@
 import requests
-from random import randint
 import pandas as pd
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import time
 from evident.bigquery import load_dataframe_to_table
 
@@ -10,15 +9,22 @@ from datetime import datetime
 from tqdm import tqdm
 import asyncio
 import aiohttp
+from concurrent.futures import ProcessPoolExecutor
+
+from page_cache import PageCache, content_hash
+from post_processing import RAW_EVENTS_TABLE
+from rate_limit import AdaptiveRateLimiter, RetryPolicy, ScrapeStats, get_with_retries
 
-# Initialize BigQuery client and load calendar URLs
-bq_client = bigquery.Client(project='evident-data-dev')
 calendar_links_id = "evident-data-dev.raw_marketscreener.calendar_links"
-calendar_urls = bq_client.list_rows(calendar_links_id).to_dataframe()
 
-# Set up rate limiting for async requests
-RATE_LIMIT = 10
-semaphore = asyncio.Semaphore(RATE_LIMIT)
+# Maximum open connections; the request rate itself is set by the AdaptiveRateLimiter
+MAX_CONNECTIONS = 10
+
+# Worker processes used to parse pages off the event loop
+PARSE_WORKERS = 4
+
+# Only build the tree for the events card, the rest of the page is never used
+EVENTS_CARD_STRAINER = SoupStrainer("div", id="next-events-card")
 
 # HTTP headers for requests to MarketScreener
 HEADERS = {
@@ -36,71 +42,113 @@ def clean_event(event):
     event = event.strip()
     return "".join(event.split('  '))
 
-async def fetch_event_data(session, url, progress_bar):
+def parse_events(html_content):
+    """Parse (date, event) pairs from the next-events-card of a calendar page."""
+    soup = BeautifulSoup(html_content, 'lxml', parse_only=EVENTS_CARD_STRAINER)
+    events_card = soup.find("div", {"id": "next-events-card"})
+    if not events_card:
+        return []
+    upcoming_events = [event.text for event in events_card.find_all('tr')]
+    clean_events = [clean_event(event) for event in upcoming_events]
+    return [(x.split('\n\n')[0].split('\n')[0], x.split('\n\n')[1]) for x in clean_events]
+
+async def fetch_event_data(session, url, progress_bar, page_cache=None, limiter=None, retry_policy=None, stats=None, parse_executor=None):
     """
     Asynchronously fetch and parse event data from a MarketScreener calendar URL.
-    Returns a DataFrame with columns: url, date, event.
+    Returns a list of (url, date, event) tuples.
+    Requests go through the shared AdaptiveRateLimiter and are retried on 429/5xx/timeouts.
+    Parsing runs in parse_executor (the loop's default executor if None) to keep the event loop free.
+    With a PageCache, pages are requested conditionally and unchanged pages (304 or same
+    content hash) reuse the previously parsed events instead of being parsed again.
     """
-    async with semaphore:
-        try:
-            await asyncio.sleep(randint(1, 3))  # Random sleep to avoid rate-limiting
-            async with session.get(
-                url=url,
-                headers=HEADERS,
-                timeout=30
-            ) as response:
-                if response.status == 200:
-                    html_content = await response.text()
-                    soup = BeautifulSoup(html_content, 'html.parser')
-                    events_card = soup.find("div", {"id": "next-events-card"})
-                    if events_card:
-                        upcoming_events = [event.text for event in events_card.find_all('tr')]
-                        clean_events = [clean_event(event) for event in upcoming_events]
-                        dates = [x.split('\n\n')[0].split('\n')[0] for x in clean_events]
-                        event_names = [x.split('\n\n')[1] for x in clean_events]
-                    else:
-                        dates = []
-                        event_names = []
-                else:
-                    print(f"Error: Status code {response.status} for URL {url}")
-                    dates = []
-                    event_names = []
-                progress_bar.update(1)
-                return pd.DataFrame({'url': url, 'date': dates, 'event': event_names})
-        except asyncio.TimeoutError:
-            print(f"Timeout error for URL {url}")
-            progress_bar.update(1)
-            return pd.DataFrame({'url': url, 'date': [], 'event': []})
-        except Exception as e:
-            print(f"Error fetching data for URL {url}: {e}")
-            progress_bar.update(1)
-            return pd.DataFrame({'url': url, 'date': [], 'event': []})
-
-async def fetch_marketscreener_urls(urls):
+    limiter = limiter or AdaptiveRateLimiter()
+    retry_policy = retry_policy or RetryPolicy()
+    stats = stats or ScrapeStats()
+    try:
+        cached = page_cache.get(url) if page_cache else None
+        request_headers = {**HEADERS, **page_cache.conditional_headers(cached)} if page_cache else HEADERS
+        response = await get_with_retries(session, url, request_headers, limiter, retry_policy, stats)
+        if response.status == 304 and cached:
+            events = cached.events
+            page_cache.touch(cached, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            page_cache.stats["not_modified"] += 1
+        elif response.status == 200:
+            page_hash = content_hash(response.text)
+            if cached and cached.content_hash == page_hash:
+                events = cached.events
+                page_cache.stats["same_hash"] += 1
+            else:
+                events = await asyncio.get_running_loop().run_in_executor(parse_executor, parse_events, response.text)
+                if page_cache:
+                    page_cache.stats["parsed"] += 1
+            if page_cache:
+                page_cache.put(url, response.headers.get('ETag'), response.headers.get('Last-Modified'), page_hash, events)
+        else:
+            print(f"Error: Status code {response.status} for URL {url}")
+            events = []
+        progress_bar.update(1)
+        return [(url, date, event) for date, event in events]
+    except asyncio.TimeoutError:
+        print(f"Timeout error for URL {url}")
+        progress_bar.update(1)
+        return []
+    except Exception as e:
+        print(f"Error fetching data for URL {url}: {e}")
+        progress_bar.update(1)
+        return []
+
+def events_to_frame(results):
+    """Collect the per-URL lists of (url, date, event) tuples into one DataFrame."""
+    rows = [row for url_rows in results for row in url_rows]
+    return pd.DataFrame(rows, columns=['url', 'date', 'event'])
+
+async def fetch_marketscreener_urls(urls, page_cache=None, limiter=None, retry_policy=None, parse_workers=PARSE_WORKERS):
     """
     Orchestrates asynchronous fetching of event data for all provided URLs.
+    The request rate is set by one AdaptiveRateLimiter shared by all tasks, pages are parsed
+    in a pool of parse_workers processes, and a throughput/latency summary is printed at the end.
+    Returns one DataFrame with columns: url, date, event.
     """
-    connector = aiohttp.TCPConnector(limit=10, limit_per_host=5)
-    async with aiohttp.ClientSession(connector=connector) as session:
-        with tqdm(total=len(urls)) as progress_bar:
-            tasks = [fetch_event_data(session, url, progress_bar) for url in urls]
-            results = await asyncio.gather(*tasks)
-        return results
-
-async def main():
+    limiter = limiter or AdaptiveRateLimiter()
+    retry_policy = retry_policy or RetryPolicy()
+    stats = ScrapeStats()
+    connector = aiohttp.TCPConnector(limit=MAX_CONNECTIONS, limit_per_host=MAX_CONNECTIONS)
+    with ProcessPoolExecutor(max_workers=parse_workers) as parse_executor:
+        async with aiohttp.ClientSession(connector=connector) as session:
+            with tqdm(total=len(urls)) as progress_bar:
+                tasks = [fetch_event_data(session, url, progress_bar, page_cache, limiter, retry_policy, stats, parse_executor)
+                         for url in urls]
+                results = await asyncio.gather(*tasks)
+    if page_cache:
+        print(f"Page cache: {page_cache.stats['not_modified']} not modified, "
+              f"{page_cache.stats['same_hash']} unchanged content, {page_cache.stats['parsed']} parsed")
+    stats.print_summary(len(urls))
+    return events_to_frame(results)
+
+def load_calendar_urls(project_id='evident-data-dev', bq_client=None):
+    """Load the MarketScreener calendar links to scrape."""
+    bq_client = bq_client or bigquery.Client(project=project_id)
+    return bq_client.list_rows(calendar_links_id).to_dataframe()
+
+async def main(calendar_urls):
     """
     Main async entry point: fetch all events for all calendar URLs.
     """
     urls = calendar_urls.market_screener_link.values
     start_time = time.time()
-    events_data = await fetch_marketscreener_urls(urls)
+    page_cache = PageCache()
+    try:
+        events_data = await fetch_marketscreener_urls(urls, page_cache)
+    finally:
+        page_cache.close()
     print(f"Completed {len(urls)} requests in {time.time() - start_time} seconds.")
     return events_data
 
-if __name__ == "__main__":
-    # Run async scraping and aggregate results
-    events_data = pd.concat(asyncio.run(main()))
-    # Merge scraped events with company metadata
+def build_raw_events(events_data, calendar_urls):
+    """
+    Merge scraped events with company metadata and format them for the raw events table.
+    Returns a DataFrame with columns: name, date, company_id, event.
+    """
     company_events_data = events_data.merge(
         calendar_urls[['market_screener_link', 'company_id', 'name']],
         left_on='url',
@@ -114,11 +162,17 @@ if __name__ == "__main__":
     # Select only required columns
     output_df = company_events_data[['name', 'date', 'company_id', 'event']]
     # Remove duplicates and reset index
-    output_df.drop_duplicates(inplace=True)
-    output_df.reset_index(drop=True, inplace=True)
+    output_df = output_df.drop_duplicates()
+    return output_df.reset_index(drop=True)
+
+if __name__ == "__main__":
+    # Run async scraping and aggregate results
+    calendar_urls = load_calendar_urls()
+    events_data = asyncio.run(main(calendar_urls))
+    output_df = build_raw_events(events_data, calendar_urls)
     # Upload results to BigQuery
     load_dataframe_to_table(
         output_df,
-        'evident-data-dev.raw_marketscreener.events'
+        RAW_EVENTS_TABLE
     )
     print("uploaded")
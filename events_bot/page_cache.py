@@ -0,0 +1,75 @@
+import hashlib
+import json
+import sqlite3
+import time
+from collections import namedtuple
+
+
+DEFAULT_PAGE_CACHE_PATH = "marketscreener_page_cache.sqlite"
+
+CachedPage = namedtuple("CachedPage", ["url", "etag", "last_modified", "content_hash", "events", "fetched_at"])
+
+
+def content_hash(html):
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+class PageCache:
+    """
+    Persistent cache of MarketScreener calendar pages keyed by URL.
+    Stores the ETag/Last-Modified validators, a hash of the page body and the events parsed
+    from it, so unchanged pages can be revalidated with a conditional request and not re-parsed.
+    """
+    def __init__(self, path=DEFAULT_PAGE_CACHE_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                events TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+        self.stats = {"not_modified": 0, "same_hash": 0, "parsed": 0}
+
+    def get(self, url):
+        row = self.conn.execute(
+            "SELECT url, etag, last_modified, content_hash, events, fetched_at FROM pages WHERE url = ?",
+            (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        url, etag, last_modified, page_hash, events, fetched_at = row
+        return CachedPage(url, etag, last_modified, page_hash, [tuple(event) for event in json.loads(events)], fetched_at)
+
+    def conditional_headers(self, cached):
+        """Request headers that let the server answer 304 Not Modified for a cached page."""
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        return headers
+
+    def put(self, url, etag, last_modified, page_hash, events):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages (url, etag, last_modified, content_hash, events, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (url, etag, last_modified, page_hash, json.dumps(list(events)), time.time())
+        )
+        self.conn.commit()
+
+    def touch(self, cached, etag=None, last_modified=None):
+        """Refresh validators and fetch time of a page that hasn't changed."""
+        self.put(cached.url,
+                 etag or cached.etag,
+                 last_modified or cached.last_modified,
+                 cached.content_hash,
+                 cached.events)
+
+    def close(self):
+        self.conn.close()
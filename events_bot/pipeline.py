@@ -0,0 +1,72 @@
+"""
+Single entry point for the MarketScreener events pipeline: scrape -> clean -> upload.
+
+The scraped frame is passed straight into the cleaning stage in memory, so the raw table is
+written but never downloaded again. Raw and curated tables are uploaded in parallel.
+
+    python pipeline.py                      # scrape, curate and upload both tables
+    python pipeline.py --dry-run            # scrape and curate only
+    python pipeline.py --reread-curated     # also read back the curated table after upload
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from google.cloud import bigquery
+from evident.bigquery import load_dataframe_to_table
+
+from date_scraper import build_raw_events, load_calendar_urls, main as scrape_events
+from post_processing import CURATED_EVENTS_TABLE, RAW_EVENTS_TABLE, curate_events
+
+
+_bq_clients = {}
+
+
+def get_bq_client(project_id):
+    """Create the BigQuery client on first use, so importing this module has no side effects."""
+    if project_id not in _bq_clients:
+        _bq_clients[project_id] = bigquery.Client(project=project_id)
+    return _bq_clients[project_id]
+
+
+def upload_tables(tables):
+    """Upload {table_id: DataFrame} concurrently, one thread per table."""
+    with ThreadPoolExecutor(max_workers=len(tables)) as executor:
+        futures = [executor.submit(load_dataframe_to_table, df, table_id) for table_id, df in tables.items()]
+        for future in futures:
+            future.result()
+    print(f"Uploaded {', '.join(tables)}")
+
+
+def run_pipeline(project_id='evident-data-dev', upload=True, reread_curated=False):
+    """
+    Run scrape -> clean -> upload and return {"raw": DataFrame, "curated": DataFrame}.
+    With reread_curated, the curated table is read back from BigQuery after the upload.
+    """
+    start_time = time.time()
+    bq_client = get_bq_client(project_id)
+
+    calendar_urls = load_calendar_urls(project_id, bq_client=bq_client)
+    raw_events = build_raw_events(asyncio.run(scrape_events(calendar_urls)), calendar_urls)
+    curated_events = curate_events(raw_events)
+    print(f"Scraped {len(raw_events)} raw events, {len(curated_events)} after cleaning.")
+
+    if upload:
+        upload_tables({RAW_EVENTS_TABLE: raw_events, CURATED_EVENTS_TABLE: curated_events})
+
+    if reread_curated:
+        curated_events = bq_client.list_rows(CURATED_EVENTS_TABLE).to_dataframe()
+
+    print(f"Pipeline finished in {time.time() - start_time:.1f} seconds.")
+    return {"raw": raw_events, "curated": curated_events}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape, clean and upload MarketScreener events.")
+    parser.add_argument("--project", default="evident-data-dev")
+    parser.add_argument("--dry-run", action="store_true", help="skip the BigQuery uploads")
+    parser.add_argument("--reread-curated", action="store_true", help="read the curated table back after uploading")
+    args = parser.parse_args()
+
+    run_pipeline(args.project, upload=not args.dry_run, reread_curated=args.reread_curated)
@@ -1,38 +1,66 @@
+import re
+
 import pandas as pd
 from google.cloud import bigquery
-from evident.ds import dolly
 from evident.bigquery import load_dataframe_to_table
 
-# Initialize BigQuery client and load raw events data
-bq_client = bigquery.Client(project='evident-data-dev')
-events_id = "evident-data-dev.raw_marketscreener.events"
-processed_events = bq_client.list_rows(events_id).to_dataframe()
+RAW_EVENTS_TABLE = "evident-data-dev.raw_marketscreener.events"
+CURATED_EVENTS_TABLE = "evident-data-dev.curated_marketscreener.events"
+
+# Events containing any of these keywords (case-insensitive) are dropped from the curated table
+EVENTS_TO_FILTER_KWS = {'NOT_INTERESTING': ['dividend', 'Détachement']}
+
+# Substring replacements applied to every event name, in order
+EVENT_NAME_REPLACEMENTS = [('Release', 'Call'), ('(Projected)', ''), ('Pre-market', '')]
+
+def load_raw_events(project_id='evident-data-dev', bq_client=None):
+    """Load the raw events uploaded by date_scraper.py."""
+    bq_client = bq_client or bigquery.Client(project=project_id)
+    return bq_client.list_rows(RAW_EVENTS_TABLE).to_dataframe()
+
+def compile_keyword_pattern(keywords_by_tag):
+    """
+    Build one regex alternation from every keyword in a {tag: [keywords]} dict.
+    Longer keywords come first so overlapping keywords match the most specific one.
+    Returns None when there are no keywords, since an empty pattern would match every event.
+    """
+    keywords = sorted({kw for kws in keywords_by_tag.values() for kw in kws}, key=len, reverse=True)
+    if not keywords:
+        return None
+    return re.compile("|".join(re.escape(kw) for kw in keywords), re.IGNORECASE)
 
-def clean_earnings_calls(event_name):
+def clean_earnings_calls(event_names):
     """
-    Standardize event names by removing or replacing common substrings.
+    Standardize a Series of event names by removing or replacing common substrings.
     """
-    event_name = event_name.replace('Release', 'Call')
-    event_name = event_name.replace('(Projected)', '')
-    event_name = event_name.replace('Pre-market', '')
-    return event_name.strip()
+    for old, new in EVENT_NAME_REPLACEMENTS:
+        event_names = event_names.str.replace(old, new, regex=False)
+    return event_names.str.strip()
 
-def clean_events(df):
+def clean_events(df, keywords_by_tag=EVENTS_TO_FILTER_KWS):
     """
     Filter out uninteresting events and return relevant columns.
     """
-    events_to_filter_kws = {'NOT_INTERESTING': ['dividend', 'Détachement']}
-    df['not_interesting'] = dolly.keywords_over_text(df, 'event', events_to_filter_kws)['tags']
-    df = df[df.not_interesting.apply(lambda x: len(x) == 0)]
-    return df[['date', 'event', 'name']].reset_index(drop=True)
-
-# Clean and filter event names
-processed_events['event'] = processed_events['event'].apply(clean_earnings_calls)
-filtered_events = clean_events(processed_events)
-
-# Upload the curated events to BigQuery
-load_dataframe_to_table(
-    filtered_events,
-    'evident-data-dev.curated_marketscreener.events'
-)
-print("uploaded")
+    pattern = compile_keyword_pattern(keywords_by_tag)
+    if pattern is None:
+        return df.loc[:, ['date', 'event', 'name']].reset_index(drop=True)
+    not_interesting = df['event'].str.contains(pattern, na=False)
+    return df.loc[~not_interesting, ['date', 'event', 'name']].reset_index(drop=True)
+
+def curate_events(raw_events, keywords_by_tag=EVENTS_TO_FILTER_KWS):
+    """Clean event names and filter out uninteresting events from a raw events frame."""
+    processed_events = raw_events.copy()
+    # pyarrow-backed strings run the replacements and regex match in vectorised kernels
+    processed_events['event'] = clean_earnings_calls(processed_events['event'].astype('string[pyarrow]'))
+    return clean_events(processed_events, keywords_by_tag)
+
+if __name__ == "__main__":
+    # Clean and filter event names
+    filtered_events = curate_events(load_raw_events())
+
+    # Upload the curated events to BigQuery
+    load_dataframe_to_table(
+        filtered_events,
+        CURATED_EVENTS_TABLE
+    )
+    print("uploaded")
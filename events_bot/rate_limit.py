@@ -0,0 +1,158 @@
+import asyncio
+import random
+import time
+from collections import Counter, defaultdict, namedtuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+
+# Statuses that mean "slow down / try again later" rather than a broken page
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+FetchResult = namedtuple("FetchResult", ["status", "headers", "text"])
+
+
+class AdaptiveRateLimiter:
+    """
+    Per-host token bucket whose rate adapts with AIMD (additive increase, multiplicative decrease).
+    Every successful response raises the host's rate by roughly additive_increase requests/s per
+    second of traffic; a 429/5xx/timeout multiplies it by decrease_factor (at most once per
+    cooldown seconds) and honours Retry-After by pausing the host.
+    """
+    def __init__(self,
+                 initial_rate=5.0,
+                 min_rate=0.5,
+                 max_rate=50.0,
+                 additive_increase=1.0,
+                 decrease_factor=0.5,
+                 cooldown=1.0):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.additive_increase = additive_increase
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.rates = defaultdict(lambda: self.initial_rate)
+        self.tokens = defaultdict(lambda: 1.0)
+        self.last_refill = defaultdict(time.monotonic)
+        self.paused_until = defaultdict(float)
+        self.last_decrease = defaultdict(float)
+        self.locks = defaultdict(asyncio.Lock)
+
+    async def acquire(self, host):
+        async with self.locks[host]:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until[host]:
+                    await asyncio.sleep(self.paused_until[host] - now)
+                    continue
+                rate = self.rates[host]
+                self.tokens[host] = min(max(1.0, rate), self.tokens[host] + (now - self.last_refill[host]) * rate)
+                self.last_refill[host] = now
+                if self.tokens[host] >= 1:
+                    self.tokens[host] -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens[host]) / rate)
+
+    def on_success(self, host):
+        rate = self.rates[host]
+        self.rates[host] = min(self.max_rate, rate + self.additive_increase / rate)
+
+    def on_throttle(self, host, retry_after=None):
+        now = time.monotonic()
+        if now - self.last_decrease[host] >= self.cooldown:
+            self.rates[host] = max(self.min_rate, self.rates[host] * self.decrease_factor)
+            self.last_decrease[host] = now
+        if retry_after:
+            self.paused_until[host] = max(self.paused_until[host], now + retry_after)
+
+
+class RetryPolicy:
+    """Jittered exponential backoff: attempt n waits a random time up to base_delay * 2**n (capped)."""
+    def __init__(self, max_retries=4, base_delay=1.0, max_delay=30.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt, retry_after=None):
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return max(backoff, retry_after or 0)
+
+
+class ScrapeStats:
+    """Counts statuses, retries and request latencies for the end-of-run summary."""
+    def __init__(self):
+        self.start_time = time.monotonic()
+        self.latencies = []
+        self.statuses = Counter()
+        self.retries = 0
+        self.failures = 0
+
+    def record(self, status, latency):
+        self.statuses[status] += 1
+        self.latencies.append(latency)
+
+    def summary(self, pages):
+        elapsed = time.monotonic() - self.start_time
+        latencies = sorted(self.latencies) or [0.0]
+        return {
+            "pages": pages,
+            "requests": len(self.latencies),
+            "retries": self.retries,
+            "failures": self.failures,
+            "elapsed_seconds": round(elapsed, 2),
+            "pages_per_second": round(pages / elapsed, 2) if elapsed else 0.0,
+            "latency_p50": round(latencies[len(latencies) // 2], 3),
+            "latency_p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+            "statuses": dict(self.statuses),
+        }
+
+    def print_summary(self, pages):
+        summary = self.summary(pages)
+        print(f"Fetched {summary['pages']} pages in {summary['elapsed_seconds']}s "
+              f"({summary['pages_per_second']} pages/s), {summary['requests']} requests, "
+              f"{summary['retries']} retries, {summary['failures']} failures, "
+              f"latency p50 {summary['latency_p50']}s / p95 {summary['latency_p95']}s, "
+              f"statuses {summary['statuses']}")
+        return summary
+
+
+def _retry_after_seconds(headers):
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+async def get_with_retries(session, url, headers, limiter, retry_policy, stats, timeout=30):
+    """
+    GET a URL through the host's rate limiter, retrying 429/5xx and timeouts with backoff.
+    Returns a FetchResult; if retries run out on a retryable status, that status is returned,
+    and if they run out on a timeout or connection error, the error is raised.
+    """
+    host = urlsplit(url).netloc
+    for attempt in range(retry_policy.max_retries + 1):
+        await limiter.acquire(host)
+        start = time.monotonic()
+        try:
+            async with session.get(url=url, headers=headers, timeout=timeout) as response:
+                text = await response.text() if response.status == 200 else None
+                stats.record(response.status, time.monotonic() - start)
+                if response.status not in RETRY_STATUSES:
+                    limiter.on_success(host)
+                    return FetchResult(response.status, response.headers, text)
+                retry_after = _retry_after_seconds(response.headers)
+                limiter.on_throttle(host, retry_after)
+                if attempt == retry_policy.max_retries:
+                    stats.failures += 1
+                    return FetchResult(response.status, response.headers, None)
+        except (asyncio.TimeoutError, aiohttp.ClientError):
+            stats.record("error", time.monotonic() - start)
+            limiter.on_throttle(host)
+            retry_after = None
+            if attempt == retry_policy.max_retries:
+                stats.failures += 1
+                raise
+        stats.retries += 1
+        await asyncio.sleep(retry_policy.delay(attempt, retry_after))
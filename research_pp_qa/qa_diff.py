@@ -0,0 +1,185 @@
+"""
+QA diff between the old (BigQuery) and new Google Scholar research paper outputs.
+
+Papers are matched on a normalised paper_url in both directions with hash lookups, and the
+reasons a paper was dropped are computed as vectorised bit flags instead of a row-wise apply,
+so full multi-sector datasets take seconds. Outputs are written as Parquet and Excel.
+
+    python qa_diff.py --new input/research_papers_new_processing.csv --qa input/research_papers_qa_dataset.csv
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+OLD_OUTPUT_TABLE = 'evident-data-dev.curated_google_scholar.banking_research'
+
+# bit i of exclusion_flags is set when EXCLUSION_REASONS[i] applies
+EXCLUSION_REASONS = ("is_patent", "excluded_tags", "no_tags", "no_authors", "no_publication_date", "no_author_name")
+REASON_BITS = {reason: np.uint8(1 << bit) for bit, reason in enumerate(EXCLUSION_REASONS)}
+
+QA_COLUMNS = ["authors", "url", "title", "publication_date", "description", "is_patent", "tags",
+              "excluded_tags", "keyword_tags", "has_publication_info", "author_name"]
+
+
+def normalise_url(urls):
+    """
+    Comparable form of URLs: no scheme, www., fragment or trailing slash, lower-case host.
+    Runs in Arrow compute kernels, so millions of URLs take well under a second.
+    """
+    index = urls.index
+    urls = pc.utf8_trim_whitespace(pa.array(urls.astype("string[pyarrow]")).cast(pa.large_string()))
+    urls = pc.replace_substring_regex(urls, pattern=r"(?i)^https?://(?:www\.)?", replacement="")
+    urls = pc.replace_substring_regex(urls, pattern=r"#.*$", replacement="")
+    urls = pc.utf8_rtrim(urls, characters="/")
+    parts = pc.extract_regex(urls, pattern=r"^(?P<host>[^/?]*)(?P<path>.*)$")
+    normalised = pc.binary_join_element_wise(pc.utf8_lower(parts.field("host")), parts.field("path"),
+                                             pa.scalar("", type=pa.large_string()))
+    return pd.Series(pd.arrays.ArrowStringArray(normalised), index=index)
+
+
+def with_url_key(df, url_column):
+    """df with a url_key column of normalised URLs, computed once and reused by the joins."""
+    if "url_key" in df.columns:
+        return df
+    return df.assign(url_key=normalise_url(df[url_column]))
+
+
+def diff_papers(old_df, new_df, url_column="paper_url"):
+    """
+    (old_not_new, new_not_old): papers of each output whose normalised URL is missing from the
+    other, deduplicated on URL and carrying their url_key. Both directions are hash set lookups.
+    """
+    old_df = with_url_key(old_df, url_column)
+    new_df = with_url_key(new_df, url_column)
+    old_keys = pa.array(old_df["url_key"])
+    new_keys = pa.array(new_df["url_key"])
+    old_in_new = pc.is_in(old_keys, value_set=pc.unique(new_keys)).to_numpy(zero_copy_only=False)
+    new_in_old = pc.is_in(new_keys, value_set=pc.unique(old_keys)).to_numpy(zero_copy_only=False)
+    old_not_new = old_df[~old_in_new]
+    new_not_old = new_df[~new_in_old]
+    return (old_not_new.drop_duplicates(subset=[url_column]),
+            new_not_old.drop_duplicates(subset=[url_column]))
+
+
+def attach_qa(papers, qa_df, qa_columns=QA_COLUMNS, url_column="paper_url"):
+    """Left-join the QA dataset onto papers by normalised URL (first QA row per URL)."""
+    papers = with_url_key(papers, url_column)
+    qa_df = with_url_key(qa_df, "url")
+    qa = qa_df[qa_columns + ["url_key"]].drop_duplicates("url_key")
+    joined = papers.merge(qa, on="url_key", how="left")
+    return joined.drop(columns=["url_key", "url"])
+
+
+def exclusion_flags(papers):
+    """uint8 bit flags of the exclusion reasons for every row; empty lists ("[]") count as missing."""
+    papers = papers.replace("[]", np.nan)
+    conditions = {
+        "is_patent": papers["is_patent"].eq(True),
+        "excluded_tags": papers["excluded_tags"].notna(),
+        "no_tags": papers["tags"].isna(),
+        "no_authors": papers["authors"].isna(),
+        "no_publication_date": papers["publication_date"].isna(),
+        "no_author_name": papers["author_name"].isna(),
+    }
+    flags = np.zeros(len(papers), dtype=np.uint8)
+    for reason, condition in conditions.items():
+        # nullable boolean columns (after read_parquet or convert_dtypes) hold <NA>, which is not a reason
+        flags |= np.where(condition.to_numpy(dtype=bool, na_value=False), REASON_BITS[reason], np.uint8(0))
+    return pd.Series(flags, index=papers.index, name="exclusion_flags")
+
+
+def reasons_from_flags(flags):
+    """List of reason names per row, decoded once per distinct flag value."""
+    decoded = {flag: [reason for reason in EXCLUSION_REASONS if flag & REASON_BITS[reason]]
+               for flag in pd.unique(flags)}
+    return flags.map(decoded)
+
+
+def add_exclusion_reasons(papers):
+    papers = papers.copy()
+    papers["exclusion_flags"] = exclusion_flags(papers)
+    papers["exclusion_reason"] = reasons_from_flags(papers["exclusion_flags"])
+    return papers
+
+
+def reason_counts(papers, by="company_name"):
+    """Per-group count of papers with each reason (a paper counts once per reason) plus a total of papers."""
+    flags = papers["exclusion_flags"].to_numpy()
+    counts = pd.DataFrame({reason: (flags & REASON_BITS[reason]) > 0 for reason in EXCLUSION_REASONS},
+                          index=papers.index)
+    counts[by] = papers[by].to_numpy()
+    counts = counts.groupby(by).sum()
+    counts = counts.loc[:, counts.sum() > 0]
+    counts["total_papers"] = papers.groupby(by).size()
+    return counts.sort_values("total_papers", ascending=False)
+
+
+def combination_counts(papers, by="company_name"):
+    """Per-group count of papers for each exact combination of reasons."""
+    combinations = reasons_from_flags(papers["exclusion_flags"]).map(lambda reasons: ", ".join(reasons) or "none")
+    combinations = combinations.rename("exclusion_reason")
+    counts = pd.crosstab(papers[by], combinations)
+    counts["total"] = counts.sum(axis=1)
+    return counts.sort_values("total", ascending=False)
+
+
+def run_qa_diff(old_df, new_df, qa_df, companies=None):
+    """
+    Full QA diff. Returns {"not_in_new", "not_in_old", "reason_counts", "combination_counts"}.
+    companies optionally restricts the not_in_old listing, as the notebooks do for spot checks.
+    """
+    old_not_new, new_not_old = diff_papers(old_df, new_df)
+    qa_df = with_url_key(qa_df, "url")
+
+    not_in_new = add_exclusion_reasons(attach_qa(old_not_new[["company_name", "paper_url", "url_key"]], qa_df))
+    not_in_new = not_in_new.drop(columns=["tags", "has_publication_info", "publication_date", "is_patent", "keyword_tags"])
+
+    if companies is not None:
+        new_not_old = new_not_old[new_not_old["company_name"].isin(companies)]
+    not_in_old = attach_qa(new_not_old[["paper_url", "paper_title", "paper_description", "url_key"]], qa_df,
+                           qa_columns=["url", "publication_date", "tags", "excluded_tags", "keyword_tags"])
+
+    print(f"{len(not_in_new)} papers in old output but not new, {len(not_in_old)} in new but not old")
+    return {"not_in_new": not_in_new,
+            "not_in_old": not_in_old,
+            "reason_counts": reason_counts(not_in_new),
+            "combination_counts": combination_counts(not_in_new)}
+
+
+def write_outputs(frames, output_dir="output", excel=True):
+    """Write every frame as <name>.parquet and, with excel, one sheet each of qa_diff.xlsx."""
+    os.makedirs(output_dir, exist_ok=True)
+    for name, frame in frames.items():
+        frame.to_parquet(os.path.join(output_dir, f"{name}.parquet"))
+    if excel:
+        with pd.ExcelWriter(os.path.join(output_dir, "qa_diff.xlsx")) as writer:
+            for name, frame in frames.items():
+                frame = frame.copy()
+                if "exclusion_reason" in frame.columns:
+                    frame["exclusion_reason"] = frame["exclusion_reason"].map(str)
+                frame.to_excel(writer, sheet_name=name[:31], index=not isinstance(frame.index, pd.RangeIndex))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Diff the old and new research paper outputs.")
+    parser.add_argument("--new", default="input/research_papers_new_processing.csv")
+    parser.add_argument("--old", default=None, help="old output file; defaults to the BigQuery table")
+    parser.add_argument("--qa", default="input/research_papers_qa_dataset.csv")
+    parser.add_argument("--output-dir", default="output")
+    parser.add_argument("--no-excel", action="store_true")
+    args = parser.parse_args()
+
+    new_output_df = pd.read_csv(args.new, index_col=0)
+    if args.old:
+        old_output_df = pd.read_parquet(args.old) if args.old.endswith(".parquet") else pd.read_csv(args.old, index_col=0)
+    else:
+        from google.cloud import bigquery
+        old_output_df = bigquery.Client(project='evident-data-dev').list_rows(OLD_OUTPUT_TABLE).to_dataframe()
+    qa_df = pd.read_csv(args.qa, index_col=0)
+
+    write_outputs(run_qa_diff(old_output_df, new_output_df, qa_df), args.output_dir, excel=not args.no_excel)
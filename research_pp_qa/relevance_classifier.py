@@ -0,0 +1,232 @@
+"""
+Async, batched AI-relevance classification of research papers with Gemini.
+
+Several papers go into each request and the model answers with a list of
+{paper_url, relevance} objects, so a few thousand papers take a few hundred requests.
+Requests run concurrently under a requests-per-minute budget and are retried with jittered
+backoff on quota and server errors, instead of sleeping for a fixed time every 100 rows.
+Every answer is stored in a SQLite cache as soon as its batch returns, so an interrupted run
+resumes where it stopped and re-runs only pay for new or changed papers.
+
+    from relevance_classifier import classify_dataframe
+    relevance_df = classify_dataframe(two_banks_df, "description", "paper_url")
+"""
+import asyncio
+import hashlib
+import random
+import sqlite3
+import time
+from typing import Literal
+
+import pandas as pd
+from google import genai
+from google.genai import errors, types
+from pydantic import BaseModel, Field
+
+
+MODEL_NAME = "google/gemini-2.5-flash"
+RETRYABLE_CODES = {429, 500, 502, 503, 504}
+# errors that would fail every other request too, so they stop the run instead of skipping a batch
+FATAL_CODES = {401, 403, 429}
+
+RELEVANCE_PAPERS_PROMPT = """
+You are an expert in AI and you will be given a list of research papers. Your task is to determine if each paper is relevant to AI or not.
+Each paper has a paper_url and a text. Answer with exactly one entry per paper, copying its paper_url unchanged, and a one word relevance: Yes, No or Unsure.
+"""
+
+USER_PROMPT = """
+        Here is your input:
+        {papers}
+        """
+
+
+class PaperRelevance(BaseModel):
+    paper_url: str = Field(..., description="The paper_url of the paper, copied exactly from the input")
+    relevance: Literal["Yes", "No", "Unsure"] = Field(..., description="Is this paper about AI?")
+
+
+class BatchRelevanceOutput(BaseModel):
+    papers: list[PaperRelevance]
+
+
+class RelevanceCache:
+    """SQLite store of relevance answers keyed by a hash of (model, prompt, paper text)."""
+    def __init__(self, path="relevance_cache.sqlite"):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS relevance (
+                cache_key TEXT PRIMARY KEY,
+                relevance TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    @staticmethod
+    def key(model_name, prompt, text):
+        return hashlib.sha256(f"{model_name}\0{prompt}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        found = {}
+        keys = list(keys)
+        # stay under SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT cache_key, relevance FROM relevance WHERE cache_key IN ({','.join('?' * len(chunk))})", chunk
+            )
+            found.update(rows)
+        return found
+
+    def put_many(self, items):
+        now = time.time()
+        self.conn.executemany("INSERT OR REPLACE INTO relevance (cache_key, relevance, created_at) VALUES (?, ?, ?)",
+                              [(key, relevance, now) for key, relevance in items])
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class RelevanceClassifier:
+    """
+    Classifies papers in batches of papers_per_request under `concurrency` in-flight requests and
+    a requests_per_minute budget. Papers missing from a batch answer are retried on their own once.
+    """
+    def __init__(self,
+                 client=None,
+                 model_name=MODEL_NAME,
+                 papers_per_request=20,
+                 max_chars_per_paper=4000,
+                 concurrency=8,
+                 requests_per_minute=60,
+                 max_retries=5,
+                 cache_path="relevance_cache.sqlite"):
+        self.client = client or genai.Client(vertexai=True, project="evident-data-dev", location="europe-west1")
+        self.model_name = model_name
+        self.papers_per_request = papers_per_request
+        self.max_chars_per_paper = max_chars_per_paper
+        self.concurrency = concurrency
+        self.requests_per_minute = requests_per_minute
+        self.max_retries = max_retries
+        self.cache_path = cache_path
+        self.model_configuration = types.GenerateContentConfig(
+            system_instruction=RELEVANCE_PAPERS_PROMPT,
+            response_mime_type="application/json",
+            response_schema=BatchRelevanceOutput,
+        )
+        self.stats = {"papers": 0, "cached": 0, "requests": 0, "retries": 0, "unanswered": 0}
+
+    def format_papers(self, papers):
+        return "\n".join(f"<paper>\npaper_url: {paper_url}\ntext: {str(text)[:self.max_chars_per_paper]}\n</paper>"
+                         for paper_url, text in papers)
+
+    async def wait_for_slot(self):
+        """Space requests evenly at requests_per_minute."""
+        if not self.requests_per_minute:
+            return
+        async with self.rate_lock:
+            delay = self.next_request_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.next_request_at = max(self.next_request_at, time.monotonic()) + 60 / self.requests_per_minute
+
+    async def classify_batch(self, papers):
+        """
+        {paper_url: relevance} for one batch of (paper_url, text), retrying quota and server errors.
+        An unparseable answer or any other API error gives no answers for the batch, so its papers
+        go through the per-paper retry; only auth and exhausted quota errors are raised.
+        """
+        for attempt in range(self.max_retries + 1):
+            async with self.semaphore:
+                await self.wait_for_slot()
+                try:
+                    self.stats["requests"] += 1
+                    response = await self.client.aio.models.generate_content(
+                        model=self.model_name,
+                        config=self.model_configuration,
+                        contents=USER_PROMPT.format(papers=self.format_papers(papers)),
+                    )
+                    if response.parsed is None:
+                        # truncated or invalid JSON
+                        print(f"Unparseable answer for a batch of {len(papers)} papers")
+                        return {}
+                    requested = {paper_url for paper_url, _ in papers}
+                    return {answer.paper_url: answer.relevance for answer in response.parsed.papers
+                            if answer.paper_url in requested}
+                except errors.APIError as e:
+                    if e.code in RETRYABLE_CODES and attempt < self.max_retries:
+                        delay = random.uniform(0, min(60, 2 * 2 ** attempt))
+                        self.stats["retries"] += 1
+                        print(f"Retryable error ({e.code}), retrying in {delay:.1f}s")
+                    elif e.code in FATAL_CODES:
+                        raise ValueError(f"Code:{e.code}", "\n", f"Message: {e.message}")
+                    else:
+                        print(f"No answers for a batch of {len(papers)} papers: {e.code} {e.message}")
+                        return {}
+            await asyncio.sleep(delay)
+
+    async def classify(self, papers):
+        """{paper_url: relevance} for (paper_url, text) pairs, served from the cache where possible."""
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.rate_lock = asyncio.Lock()
+        self.next_request_at = time.monotonic()
+        papers = list(dict(papers).items())
+        self.stats["papers"] = len(papers)
+
+        cache = RelevanceCache(self.cache_path) if self.cache_path else None
+        keys = {paper_url: RelevanceCache.key(self.model_name, RELEVANCE_PAPERS_PROMPT, text) for paper_url, text in papers}
+        cached = cache.get_many(keys.values()) if cache else {}
+        results = {paper_url: cached[key] for paper_url, key in keys.items() if key in cached}
+        self.stats["cached"] = len(results)
+        pending = [(paper_url, text) for paper_url, text in papers if paper_url not in results]
+
+        completed = 0
+        start_time = time.monotonic()
+
+        async def run_batch(batch, retry_missing=True):
+            nonlocal completed
+            answers = await self.classify_batch(batch)
+            results.update(answers)
+            if cache:
+                cache.put_many((keys[paper_url], relevance) for paper_url, relevance in answers.items())
+            missing = [(paper_url, text) for paper_url, text in batch if paper_url not in answers]
+            completed += len(batch) - len(missing)
+            if missing and retry_missing:
+                await asyncio.gather(*[run_batch([paper], retry_missing=False) for paper in missing])
+            elif missing:
+                self.stats["unanswered"] += len(missing)
+                completed += len(missing)
+            print(f"Progress: {completed}/{len(pending)} ({completed / max(len(pending), 1):.2%}) "
+                  f"in {time.monotonic() - start_time:.0f}s")
+
+        try:
+            batches = [pending[start:start + self.papers_per_request]
+                       for start in range(0, len(pending), self.papers_per_request)]
+            await asyncio.gather(*[run_batch(batch) for batch in batches])
+        finally:
+            if cache:
+                cache.close()
+        print(f"Classified {len(papers)} papers: {self.stats['cached']} from cache, "
+              f"{self.stats['requests']} requests, {self.stats['retries']} retries, {self.stats['unanswered']} unanswered")
+        return results
+
+
+def classify_dataframe(text_df: pd.DataFrame, text_column: str, identifiable_column: str, **classifier_config):
+    """
+    Classify every row of text_df as AI relevant (Yes / No / Unsure).
+    Args:
+        text_df (pd.DataFrame): papers
+        text_column str: name of the column containing the body of text to use
+        identifiable_column str: name of the column that identifies a paper, e.g. paper_url
+    Returns:
+        A pandas DataFrame with index, identifiable_column, body and relevance columns
+    """
+    classifier = RelevanceClassifier(**classifier_config)
+    relevance = asyncio.run(classifier.classify(zip(text_df[identifiable_column].astype(str), text_df[text_column])))
+    return pd.DataFrame({
+        "index": range(len(text_df)),
+        identifiable_column: text_df[identifiable_column].values,
+        "body": text_df[text_column].values,
+        "relevance": [relevance.get(str(paper_id)) for paper_id in text_df[identifiable_column]],
+    })
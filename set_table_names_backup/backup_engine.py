@@ -0,0 +1,232 @@
+"""
+Parallel, incremental Avro backups of every table in a BigQuery project.
+
+Tables are listed from the shared metadata snapshot (bq_metadata/metadata_snapshot.py), extract
+jobs are submitted up to max_in_flight at a time and polled until they finish, and a manifest
+records each table's modified time and row count at its last successful export, so tables that
+have not changed since are skipped. Failed jobs are resubmitted up to max_retries times.
+
+    python backup_engine.py                  # back up changed tables
+    python backup_engine.py --force          # back up everything
+    python backup_engine.py --dataset raw_google_patents --max-in-flight 50
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+from google.cloud import bigquery, storage
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bq_metadata"))
+from metadata_snapshot import get_snapshot
+
+
+BQ_PROJECT = "evident-data-dev"
+BACKUP_PROJECT = "evident-data-dev-backups"
+BACKUP_BUCKET = "lucas-test-exports"
+DEFAULT_MANIFEST_PATH = "backup_manifest.json"
+# consecutive failed status checks of one job before it is given up on (it is never resubmitted,
+# since it may still be running and writing to the same URIs)
+MAX_POLL_ERRORS = 10
+# shards written less than this before an extract job started are kept, in case BigQuery and GCS clocks differ
+STALE_SHARD_MARGIN = timedelta(minutes=1)
+
+
+class BackupManifest:
+    """JSON file of {"dataset.table": {modified, num_rows, gcs_uri, job_id, exported_at}}."""
+    def __init__(self, path=DEFAULT_MANIFEST_PATH):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as manifest_file:
+                self.entries = json.load(manifest_file)
+
+    def is_unchanged(self, table_name, modified, num_rows):
+        entry = self.entries.get(table_name)
+        return entry is not None and entry["modified"] == modified and entry["num_rows"] == num_rows
+
+    def record(self, table_name, modified, num_rows, gcs_uri, job_id):
+        self.entries[table_name] = {"modified": modified,
+                                    "num_rows": num_rows,
+                                    "gcs_uri": gcs_uri,
+                                    "job_id": job_id,
+                                    "exported_at": datetime.now(timezone.utc).isoformat()}
+        # write to a temporary file first so an interrupted run never leaves a truncated manifest
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as manifest_file:
+            json.dump(self.entries, manifest_file, indent=1, sort_keys=True)
+        os.replace(temporary_path, self.path)
+
+
+class BackupEngine:
+    def __init__(self,
+                 bq_project=BQ_PROJECT,
+                 backup_project=BACKUP_PROJECT,
+                 backup_bucket=BACKUP_BUCKET,
+                 manifest_path=DEFAULT_MANIFEST_PATH,
+                 max_in_flight=20,
+                 max_retries=3,
+                 poll_interval=5,
+                 bq_client=None,
+                 storage_client=None):
+        self.bq_project = bq_project
+        self.backup_project = backup_project
+        self.backup_bucket = backup_bucket
+        self.manifest = BackupManifest(manifest_path)
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.poll_interval = poll_interval
+        self.bq_client = bq_client or bigquery.Client(project=bq_project)
+        self.storage_client = storage_client or storage.Client(project=backup_project)
+
+        self.job_config = bigquery.ExtractJobConfig()
+        self.job_config.destination_format = bigquery.DestinationFormat.AVRO
+        self.job_config.use_avro_logical_types = True
+
+    def gcs_prefix(self, dataset_id, table_id):
+        return f"{self.backup_bucket}/{dataset_id}/{table_id}-"
+
+    def gcs_uri(self, dataset_id, table_id):
+        return f"gs://{self.backup_project}/{self.gcs_prefix(dataset_id, table_id)}*.avro"
+
+    def plan(self, snapshot, force=False, datasets=None):
+        """Rows of the snapshot to export now: standard tables that changed since their last export."""
+        tables = snapshot[snapshot["table_id"].notna()]
+        if datasets:
+            tables = tables[tables["dataset_id"].isin(datasets)]
+        skipped_types = tables[tables["table_type"] != "TABLE"]
+        for table in skipped_types.itertuples():
+            print(f"Skipping {table.dataset_id}.{table.table_id} as it is a {table.table_type}, not a standard TABLE.")
+        tables = tables[tables["table_type"] == "TABLE"]
+
+        to_export, unchanged = [], 0
+        for table in tables.itertuples():
+            table_name = f"{table.dataset_id}.{table.table_id}"
+            modified = None if pd.isna(table.modified) else table.modified.isoformat()
+            num_rows = None if pd.isna(table.num_rows) else int(table.num_rows)
+            if not force and modified is not None and self.manifest.is_unchanged(table_name, modified, num_rows):
+                unchanged += 1
+                continue
+            to_export.append({"table_name": table_name, "dataset_id": table.dataset_id, "table_id": table.table_id,
+                              "location": table.location, "modified": modified, "num_rows": num_rows, "attempts": 0})
+        print(f"{len(to_export)} tables to back up, {unchanged} unchanged since their last export, "
+              f"{len(skipped_types)} views/other types skipped")
+        return to_export
+
+    def submit(self, table):
+        table["attempts"] += 1
+        table["poll_errors"] = 0
+        return self.bq_client.extract_table(
+            f"{self.bq_project}.{table['table_name']}",
+            self.gcs_uri(table["dataset_id"], table["table_id"]),
+            job_config=self.job_config,
+            location=table["location"],
+        )
+
+    def remove_stale_shards(self, table, job):
+        """
+        Delete shards left from an earlier, larger export of the same table, i.e. shards last
+        written before the extract job started. Both times come from Google's servers, never the
+        local clock, and STALE_SHARD_MARGIN allows for skew between BigQuery and GCS.
+        """
+        started = job.started or job.created
+        if started is None:
+            raise ValueError(f"extract job {job.job_id} has no start time")
+        cutoff = started - STALE_SHARD_MARGIN
+        shard_pattern = re.compile(re.escape(self.gcs_prefix(table["dataset_id"], table["table_id"])) + r"\d+\.avro$")
+        blobs = self.storage_client.list_blobs(self.backup_project, prefix=self.gcs_prefix(table["dataset_id"], table["table_id"]))
+        for blob in blobs:
+            if shard_pattern.match(blob.name) and blob.updated < cutoff:
+                blob.delete()
+
+    def run(self, force=False, datasets=None, snapshot=None):
+        """Back up every changed table and return {"exported": [...], "failed": {table: error}}."""
+        start_time = time.time()
+        # a fresh snapshot, since the skip decision depends on current modified times and row counts
+        snapshot = snapshot if snapshot is not None else get_snapshot(self.bq_project, force_refresh=True)
+        queue = deque(self.plan(snapshot, force=force, datasets=datasets))
+        total = len(queue)
+        in_flight = {}
+        exported, failed = [], {}
+
+        while queue or in_flight:
+            # one pass over the queue: retries still backing off go to the back, ready tables are submitted
+            for _ in range(len(queue)):
+                if len(in_flight) >= self.max_in_flight:
+                    break
+                table = queue.popleft()
+                if table.get("not_before", 0) > time.time():
+                    queue.append(table)
+                    continue
+                try:
+                    job = self.submit(table)
+                except Exception as e:
+                    self.handle_failure(table, e, queue, failed)
+                    continue
+                in_flight[job.job_id] = (job, table)
+
+            time.sleep(self.poll_interval)
+
+            for job_id, (job, table) in list(in_flight.items()):
+                try:
+                    if not job.done():
+                        table["poll_errors"] = 0
+                        continue
+                except Exception as e:
+                    # a failed status check says nothing about the job, so check again next round
+                    table["poll_errors"] = table.get("poll_errors", 0) + 1
+                    print(f"Could not check extract of {table['table_name']} ({e}), "
+                          f"attempt {table['poll_errors']}/{MAX_POLL_ERRORS}")
+                    if table["poll_errors"] >= MAX_POLL_ERRORS:
+                        del in_flight[job_id]
+                        failed[table["table_name"]] = e
+                    continue
+                del in_flight[job_id]
+                if job.error_result:
+                    self.handle_failure(table, job.error_result, queue, failed)
+                    continue
+                self.manifest.record(table["table_name"], table["modified"], table["num_rows"],
+                                     self.gcs_uri(table["dataset_id"], table["table_id"]), job_id)
+                exported.append(table["table_name"])
+                # the export itself succeeded, so a cleanup error is reported but does not fail the table
+                try:
+                    self.remove_stale_shards(table, job)
+                except Exception as e:
+                    print(f"Could not remove old shards of {table['table_name']}, remove any shard older than "
+                          f"this export from {self.gcs_uri(table['dataset_id'], table['table_id'])}: {e}")
+                print(f"Successfully backed up table {table['table_name']} ({len(exported)}/{total}, "
+                      f"{len(in_flight)} in flight)")
+
+        print(f"/// Back up finished in {time.time() - start_time:.0f}s: {len(exported)} exported, "
+              f"{len(failed)} failed ///")
+        for table_name, error in failed.items():
+            print(f"Error backing up table {table_name}: {error}")
+        return {"exported": exported, "failed": failed}
+
+    def handle_failure(self, table, error, queue, failed):
+        if table["attempts"] <= self.max_retries:
+            delay = random.uniform(0, min(300, 10 * 2 ** table["attempts"]))
+            table["not_before"] = time.time() + delay
+            print(f"Extract of {table['table_name']} failed ({error}), retrying in {delay:.0f}s")
+            queue.append(table)
+        else:
+            failed[table["table_name"]] = error
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Back up changed BigQuery tables to GCS as Avro.")
+    parser.add_argument("--force", action="store_true", help="export every table, changed or not")
+    parser.add_argument("--dataset", action="append", help="only back up these datasets")
+    parser.add_argument("--max-in-flight", type=int, default=20)
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST_PATH)
+    args = parser.parse_args()
+
+    engine = BackupEngine(manifest_path=args.manifest, max_in_flight=args.max_in_flight, max_retries=args.max_retries)
+    engine.run(force=args.force, datasets=args.dataset)
@@ -0,0 +1,111 @@
+from datetime import datetime
+
+import pyarrow as pa
+
+
+# Flattened, typed layout of an EventRegistry article plus our enrichment columns.
+# Fields missing from the requested projection profile are left null.
+ARTICLE_SCHEMA = pa.schema([
+    ("article_id", pa.string()),
+    ("temp_id", pa.string()),
+    ("company_id", pa.string()),
+    ("sector", pa.string()),
+    ("run_datetime", pa.string()),
+    ("uri", pa.string()),
+    ("url", pa.string()),
+    ("title", pa.string()),
+    ("body", pa.large_string()),
+    ("lang", pa.string()),
+    ("data_type", pa.string()),
+    ("is_duplicate", pa.bool_()),
+    ("date_time_pub", pa.timestamp("s", tz="UTC")),
+    ("sim", pa.float64()),
+    ("sentiment", pa.float64()),
+    ("wgt", pa.int64()),
+    ("relevance", pa.int64()),
+    ("event_uri", pa.string()),
+    ("story_uri", pa.string()),
+    ("image", pa.string()),
+    ("source_uri", pa.string()),
+    ("source_title", pa.string()),
+    ("source_importance_rank", pa.int64()),
+    ("source_alexa_global_rank", pa.int64()),
+    ("authors", pa.list_(pa.string())),
+    ("concept_uris", pa.list_(pa.string())),
+    ("concept_scores", pa.list_(pa.int64())),
+    ("category_uris", pa.list_(pa.string())),
+    ("links", pa.list_(pa.string())),
+    ("video_uris", pa.list_(pa.string())),
+    ("social_score", pa.int64()),
+])
+
+
+def _parse_date_time(value):
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def flatten_article(article):
+    """Flatten one nested EventRegistry article dict into a row matching ARTICLE_SCHEMA."""
+    source = article.get("source") or {}
+    ranking = source.get("ranking") or {}
+    concepts = article.get("concepts")
+    shares = article.get("shares")
+
+    return {
+        "article_id": article.get("article_id"),
+        "temp_id": article.get("temp_id"),
+        "company_id": None if article.get("company_id") is None else str(article["company_id"]),
+        "sector": article.get("sector"),
+        "run_datetime": article.get("run_datetime"),
+        "uri": article.get("uri"),
+        "url": article.get("url"),
+        "title": article.get("title"),
+        "body": article.get("body"),
+        "lang": article.get("lang"),
+        "data_type": article.get("dataType"),
+        "is_duplicate": article.get("isDuplicate"),
+        "date_time_pub": _parse_date_time(article.get("dateTimePub")),
+        "sim": article.get("sim"),
+        "sentiment": article.get("sentiment"),
+        "wgt": article.get("wgt"),
+        "relevance": article.get("relevance"),
+        "event_uri": article.get("eventUri"),
+        "story_uri": article.get("storyUri"),
+        "image": article.get("image"),
+        "source_uri": source.get("uri"),
+        "source_title": source.get("title"),
+        "source_importance_rank": ranking.get("importanceRank"),
+        "source_alexa_global_rank": ranking.get("alexaGlobalRank"),
+        "authors": None if article.get("authors") is None else [author.get("name") for author in article["authors"]],
+        "concept_uris": None if concepts is None else [concept.get("uri") for concept in concepts],
+        "concept_scores": None if concepts is None else [concept.get("score") for concept in concepts],
+        "category_uris": None if article.get("categories") is None else [category.get("uri") for category in article["categories"]],
+        "links": article.get("links"),
+        "video_uris": None if article.get("videos") is None else [video.get("uri") for video in article["videos"]],
+        "social_score": None if shares is None else sum(shares.values()),
+    }
+
+
+def iter_record_batches(articles, batch_size=1000):
+    """
+    Convert an iterable of articles (e.g. uri_retrieve.iter_articles) into ARTICLE_SCHEMA
+    record batches as they arrive, holding at most batch_size flattened rows at a time.
+    """
+    rows = []
+    for article in articles:
+        rows.append(flatten_article(article))
+        if len(rows) >= batch_size:
+            yield pa.RecordBatch.from_pylist(rows, schema=ARTICLE_SCHEMA)
+            rows = []
+    if rows:
+        yield pa.RecordBatch.from_pylist(rows, schema=ARTICLE_SCHEMA)
+
+
+def articles_to_arrow_table(articles, batch_size=1000):
+    """
+    Build a pyarrow Table from an iterable of articles without materialising the nested dicts.
+    Use .to_pandas() on the result instead of pd.DataFrame(list_of_dicts).
+    """
+    return pa.Table.from_batches(iter_record_batches(articles, batch_size), schema=ARTICLE_SCHEMA)
@@ -0,0 +1,161 @@
+import gzip
+import json
+import os
+import tempfile
+from abc import ABC, abstractmethod
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from google.cloud import bigquery
+
+
+class ArticleSink(ABC):
+    """
+    Base class for batch article writers used by uri_retrieve.stream_articles_to_sink.
+    Subclasses implement write_batch(list_of_dicts) and, if needed, close() and abort().
+    """
+    @abstractmethod
+    def write_batch(self, articles):
+        ...
+
+    def close(self):
+        pass
+
+    def abort(self):
+        """Release resources after a failed run without publishing what was written."""
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
+class JsonlSink(ArticleSink):
+    """
+    Append articles to a newline-delimited JSON file, gzipped if the path ends in .gz.
+    An aborted run truncates the file back to its size when the sink was opened.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.start_offset = os.path.getsize(path) if os.path.exists(path) else 0
+        opener = gzip.open if path.endswith(".gz") else open
+        self.file = opener(path, "at", encoding="utf-8")
+
+    def write_batch(self, articles):
+        for article in articles:
+            self.file.write(json.dumps(article, ensure_ascii=False, default=str) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def abort(self):
+        # drop this run's records so a re-run does not append them a second time
+        self.file.close()
+        with open(self.path, "r+b") as written:
+            written.truncate(self.start_offset)
+
+    def __str__(self):
+        return self.path
+
+
+class ParquetSink(ArticleSink):
+    """
+    Write articles to a Parquet file one row group per batch.
+    Nested values (concepts, source, links, ...) are stored as JSON strings unless an
+    explicit schema is passed, which keeps the schema identical across batches.
+    For typed columns, pass schema=article_arrow.ARTICLE_SCHEMA and flattened rows
+    (map(article_arrow.flatten_article, articles)).
+    Without a schema the columns are fixed by the first batch, and a later batch with a
+    key outside them raises ValueError rather than losing that field.
+    """
+    def __init__(self, path, schema=None):
+        self.path = path
+        self.schema = schema
+        self.encode_nested = schema is None
+        self.writer = None
+
+    def _to_table(self, articles):
+        if self.encode_nested:
+            articles = [{key: json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else value
+                         for key, value in article.items()}
+                        for article in articles]
+        if self.schema is None:
+            table = pa.Table.from_pylist(articles)
+            # columns that are all null in the first batch would otherwise be typed as null
+            self.schema = pa.schema([pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field
+                                     for field in table.schema])
+        unknown_keys = {key for article in articles for key in article} - set(self.schema.names)
+        if unknown_keys:
+            raise ValueError(f"Articles have keys that are not in the schema of {self.path}: {sorted(unknown_keys)}")
+        return pa.Table.from_pylist(articles, schema=self.schema)
+
+    def write_batch(self, articles):
+        table = self._to_table(articles)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, self.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+    def __str__(self):
+        return self.path
+
+
+class BigQueryLoadSink(ArticleSink):
+    """
+    Stage batches in a local newline-delimited JSON file and load them to BigQuery
+    with a single load job on close, so memory stays flat and only one job is used per run.
+    """
+    def __init__(self,
+                 table_id,
+                 project_id,
+                 write_disposition="WRITE_APPEND",
+                 schema=None,
+                 bq_client=None):
+        self.table_id = table_id
+        self.bq_client = bq_client or bigquery.Client(project=project_id)
+        self.job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+            write_disposition=write_disposition,
+            autodetect=schema is None,
+        )
+        if schema is not None:
+            self.job_config.schema = schema
+        staging_file = tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False)
+        staging_file.close()
+        self.staging_path = staging_file.name
+        self.staging_sink = JsonlSink(self.staging_path)
+        self.row_count = 0
+
+    def write_batch(self, articles):
+        self.staging_sink.write_batch(articles)
+        self.row_count += len(articles)
+
+    def close(self):
+        self.staging_sink.close()
+        try:
+            if self.row_count:
+                with open(self.staging_path, "rb") as staged:
+                    self.bq_client.load_table_from_file(staged,
+                                                        self.table_id,
+                                                        job_config=self.job_config).result()
+                print(f"Loaded {self.row_count} articles to `{self.table_id}`")
+        finally:
+            os.remove(self.staging_path)
+
+    def abort(self):
+        # a partial run is never loaded, so a retry does not append the same rows twice
+        self.staging_sink.close()
+        os.remove(self.staging_path)
+        print(f"Discarded {self.row_count} staged articles for `{self.table_id}`")
+
+    def __str__(self):
+        return self.table_id
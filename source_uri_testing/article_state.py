@@ -0,0 +1,117 @@
+import sqlite3
+import threading
+
+
+DEFAULT_STATE_PATH = "article_state.sqlite"
+
+
+class ArticleStateStore:
+    """
+    Local state for incremental article fetching.
+
+    Keeps a high-water mark of dateTimePub per (sector, company_id) and a compact index of the
+    temp_ids already stored for each company. temp_id is the 10 hex character SHA1 prefix, so it
+    is held as a 40-bit integer in a WITHOUT ROWID table.
+
+    Articles and watermarks are held as pending until commit(), which callers should run once
+    the articles have been written, so a failed write doesn't mark articles as seen.
+    """
+    def __init__(self, path=DEFAULT_STATE_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.pending_seen = {}
+        self.pending_watermarks = {}
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS watermarks (
+                sector TEXT NOT NULL,
+                company_id TEXT NOT NULL,
+                last_date_time_pub TEXT NOT NULL,
+                PRIMARY KEY (sector, company_id)
+            );
+            CREATE TABLE IF NOT EXISTS seen_articles (
+                company_id TEXT NOT NULL,
+                temp_key INTEGER NOT NULL,
+                PRIMARY KEY (company_id, temp_key)
+            ) WITHOUT ROWID;
+        """)
+        self.conn.commit()
+
+    def get_watermark(self, sector, company_id):
+        """Latest committed dateTimePub for a company, or None on the first run."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT last_date_time_pub FROM watermarks WHERE sector = ? AND company_id = ?",
+                (sector, str(company_id))
+            ).fetchone()
+        return row[0] if row else None
+
+    def advance_watermark(self, sector, company_id, date_time_pub):
+        if not date_time_pub:
+            return
+        key = (sector, str(company_id))
+        with self.lock:
+            if date_time_pub > self.pending_watermarks.get(key, ""):
+                self.pending_watermarks[key] = date_time_pub
+
+    def check_and_mark(self, company_id, temp_id):
+        """Return True if the article was already seen for this company, otherwise mark it as pending."""
+        company_id = str(company_id)
+        temp_key = int(temp_id, 16)
+        with self.lock:
+            pending = self.pending_seen.setdefault(company_id, set())
+            if temp_key in pending:
+                return True
+            seen = self.conn.execute(
+                "SELECT 1 FROM seen_articles WHERE company_id = ? AND temp_key = ?",
+                (company_id, temp_key)
+            ).fetchone()
+            if seen:
+                return True
+            pending.add(temp_key)
+        return False
+
+    def _pending_company_ids(self, company_ids):
+        if company_ids is None:
+            return set(self.pending_seen) | {key[1] for key in self.pending_watermarks}
+        return {str(company_id) for company_id in company_ids}
+
+    def commit(self, company_ids=None):
+        """Persist pending seen articles and watermarks, for all companies or only company_ids."""
+        with self.lock:
+            company_ids = self._pending_company_ids(company_ids)
+            for company_id in company_ids:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO seen_articles (company_id, temp_key) VALUES (?, ?)",
+                    [(company_id, temp_key) for temp_key in self.pending_seen.pop(company_id, ())]
+                )
+            for key in [key for key in self.pending_watermarks if key[1] in company_ids]:
+                self.conn.execute("""
+                    INSERT INTO watermarks (sector, company_id, last_date_time_pub) VALUES (?, ?, ?)
+                    ON CONFLICT (sector, company_id) DO UPDATE
+                    SET last_date_time_pub = MAX(last_date_time_pub, excluded.last_date_time_pub)
+                """, (*key, self.pending_watermarks.pop(key)))
+            self.conn.commit()
+
+    def discard(self, company_ids=None):
+        """Drop pending changes, e.g. after a failed write."""
+        with self.lock:
+            company_ids = self._pending_company_ids(company_ids)
+            for company_id in company_ids:
+                self.pending_seen.pop(company_id, None)
+            for key in [key for key in self.pending_watermarks if key[1] in company_ids]:
+                del self.pending_watermarks[key]
+
+    def close(self):
+        self.conn.close()
+
+
+def incremental_date_start(state, sector, company_id, date_start):
+    """
+    Move date_start up to the stored watermark's day. EventRegistry filters by day, so articles
+    from the watermark day itself come back and are dropped by the temp_id index.
+    """
+    watermark = state.get_watermark(sector, company_id)
+    if watermark and watermark[:10] > str(date_start):
+        return watermark[:10]
+    return date_start
@@ -0,0 +1,90 @@
+"""
+Local benchmarks for the source URI refresh. Nothing here touches EventRegistry or BigQuery;
+run e.g. `python benchmarks.py source_uris --domains 300 --latency 0.1`.
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from source_uri_cache import SourceUriCache, extract_domain_root, resolve_source_uris
+
+
+class FakeEventRegistry:
+    """
+    Stand-in for the EventRegistry client: getSourceUri sleeps for latency seconds, leaves
+    unmatched_rate of domains unmatched and raises for error_rate of calls. Counts its calls.
+    """
+    def __init__(self, latency=0.1, unmatched_rate=0.1, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.unmatched_rate = unmatched_rate
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def getSourceUri(self, domain_root):
+        with self.lock:
+            self.calls += 1
+            roll = self.random.random()
+        time.sleep(self.latency)
+        if roll < self.error_rate:
+            raise ConnectionError(f"simulated failure for {domain_root}")
+        if roll < self.error_rate + self.unmatched_rate:
+            return None
+        return f"{domain_root}.com"
+
+
+def make_domains(count):
+    """Outlet domains with the duplication of the real outlets table (several domains per root)."""
+    return [f"{('', 'www.', 'news.')[i % 3]}outlet{i // 3}.com" for i in range(count)]
+
+
+def legacy_resolve(eventregistry_client, domains):
+    """The previous lookup: one serial getSourceUri call per domain, nothing cached."""
+    uri_map = {}
+    for outlet_domain in domains:
+        cleaned_domain = extract_domain_root(outlet_domain)
+        try:
+            uri = eventregistry_client.getSourceUri(cleaned_domain)
+            if uri:
+                uri_map[cleaned_domain] = uri
+        except Exception as e:
+            print(f"Error retrieving URI for {cleaned_domain}: {e}")
+    return uri_map
+
+
+def bench_source_uris(domains=300, latency=0.1, max_workers=8):
+    """Time the legacy loop and the cached, concurrent lookup on a cold and then a warm cache."""
+    domain_list = make_domains(domains)
+
+    client = FakeEventRegistry(latency=latency)
+    start = time.monotonic()
+    legacy_resolve(client, domain_list)
+    print(f"legacy: {len(domain_list)} domains, {client.calls} API calls in {time.monotonic() - start:.1f}s")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = SourceUriCache(os.path.join(cache_dir, "source_uri_cache.sqlite"))
+        try:
+            for run in ("cold", "warm"):
+                client = FakeEventRegistry(latency=latency)
+                start = time.monotonic()
+                resolve_source_uris(client, domain_list, cache=cache, max_workers=max_workers)
+                print(f"cached {run}: {len(domain_list)} domains, {client.calls} API calls "
+                      f"in {time.monotonic() - start:.1f}s")
+        finally:
+            cache.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("benchmark", choices=["source_uris"])
+    parser.add_argument("--domains", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds per fake getSourceUri call")
+    parser.add_argument("--max-workers", type=int, default=8)
+    args = parser.parse_args()
+
+    if args.benchmark == "source_uris":
+        bench_source_uris(domains=args.domains, latency=args.latency, max_workers=args.max_workers)
@@ -0,0 +1,102 @@
+import hashlib
+import os
+import time
+from datetime import datetime, timezone
+
+import pyarrow.parquet as pq
+from google.cloud import bigquery
+
+
+DEFAULT_CATALOGUE_PATH = "company_concepts_catalogue.parquet"
+DEFAULT_TTL_SECONDS = 24 * 3600
+
+SECTORS = ["Index Bank", "Insurance1000", "Index Insurance", "Payments", "Index1000", "Other"]
+
+CONCEPTS_QUERY = """
+    SELECT
+            t1.id,
+            t1.name,
+            t1.additional_names,
+            t1.company_type,
+            t1.internal_classification,
+            t2.url_list
+        FROM
+            `evident-data.taxonomies.bank_metadata` AS t1
+        LEFT JOIN
+            (
+                SELECT id, ARRAY(SELECT url FROM UNNEST(concept_url) WHERE url IS NOT NULL) AS url_list
+                FROM `evident-data.staging.company_ids`
+                WHERE ARRAY_LENGTH(concept_url) > 0
+                AND EXISTS (SELECT 1 FROM UNNEST(concept_url) WHERE url IS NOT NULL)
+            ) AS t2
+        ON
+            t1.id = t2.id
+        WHERE lower(t1.internal_classification) IN UNNEST(@sectors)
+"""
+
+# changes whenever the query or sector list changes, so stale local files are refetched
+CATALOGUE_VERSION = hashlib.sha1((CONCEPTS_QUERY + ",".join(SECTORS)).encode("utf-8")).hexdigest()[:12]
+
+
+class ConceptsCatalogue:
+    """
+    Local Parquet copy of the company concepts for every sector.
+
+    All sectors are fetched with one parameterised query and stored with a fetched_at/version
+    stamp in the file metadata. The file is refetched when it is older than ttl or was written
+    by a different CATALOGUE_VERSION; otherwise each search job only reads the local file.
+    """
+    def __init__(self, project_id, path=DEFAULT_CATALOGUE_PATH, ttl=DEFAULT_TTL_SECONDS):
+        self.project_id = project_id
+        self.path = path
+        self.ttl = ttl
+        self.by_sector = None
+
+    def is_fresh(self):
+        if not os.path.exists(self.path):
+            return False
+        metadata = pq.read_schema(self.path).metadata or {}
+        if metadata.get(b"version", b"").decode() != CATALOGUE_VERSION:
+            return False
+        fetched_at = float(metadata.get(b"fetched_at", b"0"))
+        return time.time() - fetched_at < self.ttl
+
+    def refresh(self):
+        """Fetch every sector from BigQuery and rewrite the local file."""
+        client = bigquery.Client(project=self.project_id)
+        job_config = bigquery.QueryJobConfig(query_parameters=[
+            bigquery.ArrayQueryParameter("sectors", "STRING", [sector.lower() for sector in SECTORS])
+        ])
+        table = client.query(CONCEPTS_QUERY, job_config=job_config).to_arrow()
+        table = table.replace_schema_metadata({
+            "version": CATALOGUE_VERSION,
+            "fetched_at": str(time.time()),
+            "fetched_at_iso": datetime.now(timezone.utc).isoformat(),
+        })
+        pq.write_table(table, self.path)
+        print(f"Refreshed concepts catalogue with {table.num_rows} companies at {self.path}")
+        self.by_sector = None
+
+    def load(self, force_refresh=False):
+        if force_refresh or not self.is_fresh():
+            self.refresh()
+        by_sector = {}
+        for company in pq.read_table(self.path).to_pylist():
+            by_sector.setdefault((company["internal_classification"] or "").lower(), []).append(company)
+        self.by_sector = by_sector
+
+    def companies(self, sector):
+        """Company rows (id, name, additional_names, company_type, internal_classification, url_list) for a sector."""
+        if self.by_sector is None:
+            self.load()
+        return [dict(company) for company in self.by_sector.get(sector.lower(), [])]
+
+
+_catalogues = {}
+
+
+def get_catalogue(project_id, path=DEFAULT_CATALOGUE_PATH):
+    """Process-wide catalogue per project, so repeated lookups are served from memory."""
+    if (project_id, path) not in _catalogues:
+        _catalogues[(project_id, path)] = ConceptsCatalogue(project_id, path=path)
+    return _catalogues[(project_id, path)]
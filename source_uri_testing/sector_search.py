@@ -0,0 +1,167 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from uri_retrieve import (ARTIFICIAL_INTELLIGENCE_CONCEPTS,
+                          RETURN_INFO,
+                          fetch_company_concepts_list,
+                          iter_articles,
+                          login_eventregistry)
+
+
+class TokenQuotaExceeded(Exception):
+    """Raised when a search would spend more EventRegistry tokens than the run budget allows."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by every worker of a sector search.
+    rate is the refill speed in tokens per second and capacity the largest burst.
+    budget, if set, is the total number of tokens the run may spend.
+    """
+    def __init__(self, rate, capacity=None, budget=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.budget = budget
+        self.tokens = self.capacity
+        self.spent = 0
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        while True:
+            with self.lock:
+                if self.budget is not None and self.spent + tokens > self.budget:
+                    raise TokenQuotaExceeded(f"EventRegistry token budget of {self.budget} used up")
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    self.spent += tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def remaining_token_quota(eventregistry_client):
+    """Tokens left on the EventRegistry plan, from getUsageInfo()."""
+    usage = eventregistry_client.getUsageInfo()
+    return usage["availableTokens"] - usage["usedTokens"]
+
+
+def rate_limit_client(eventregistry_client, limiter, tokens_per_request=1):
+    """
+    Make every paginated request of an EventRegistry client take tokens from limiter.
+    QueryArticlesIter fetches each page through execQuery, so wrapping it on the
+    instance covers the whole iterator without changing the client type.
+    """
+    exec_query = eventregistry_client.execQuery
+
+    def limited_exec_query(*args, **kwargs):
+        limiter.acquire(tokens_per_request)
+        return exec_query(*args, **kwargs)
+
+    eventregistry_client.execQuery = limited_exec_query
+    return eventregistry_client
+
+
+def search_with_retries(search, max_retries=4, base_delay=2.0, max_delay=60.0):
+    """Run search(), retrying with jittered exponential backoff. Quota errors are not retried."""
+    for attempt in range(max_retries + 1):
+        try:
+            return search()
+        except TokenQuotaExceeded:
+            raise
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            delay = min(max_delay, base_delay * 2 ** attempt) * random.uniform(0.5, 1.5)
+            print(f"Search failed ({e}), retrying in {delay:.1f}s ({attempt + 1}/{max_retries})")
+            time.sleep(delay)
+
+
+def iter_sector_articles(sector,
+                         project_id,
+                         date_start,
+                         date_end,
+                         client_factory=login_eventregistry,
+                         max_workers=8,
+                         requests_per_second=5,
+                         token_budget=None,
+                         tokens_per_request=1,
+                         max_retries=4,
+                         topic_concepts=ARTIFICIAL_INTELLIGENCE_CONCEPTS,
+                         return_info=RETURN_INFO,
+                         state=None,
+                         ):
+    """
+    Search articles for every company of a sector concurrently and yield
+    (company, articles, error) as each company finishes.
+
+    Each worker thread gets its own EventRegistry client from client_factory (the client
+    serialises its own requests), and all of them share one TokenBucket. If token_budget
+    is None the remaining plan quota is used as the budget.
+
+    With an article_state.ArticleStateStore as state, each company is fetched incrementally and
+    its state is committed once the caller has handled the yielded articles.
+    """
+    companies = [company for company in fetch_company_concepts_list(sector, project_id) if company["url_list"]]
+
+    if token_budget is None:
+        token_budget = remaining_token_quota(client_factory())
+    limiter = TokenBucket(rate=requests_per_second, budget=token_budget)
+
+    local = threading.local()
+
+    def company_client():
+        if not hasattr(local, "client"):
+            local.client = rate_limit_client(client_factory(), limiter, tokens_per_request)
+        return local.client
+
+    def search_company(company):
+        def search_once():
+            if state is not None:
+                # a retried attempt must not skip the articles marked by the failed one
+                state.discard([company["id"]])
+            return list(iter_articles(list(company["url_list"]),
+                                      company_client(),
+                                      date_start,
+                                      date_end,
+                                      company["id"],
+                                      sector,
+                                      topic_concepts=topic_concepts,
+                                      return_info=return_info,
+                                      state=state))
+
+        return search_with_retries(search_once, max_retries=max_retries)
+
+    start_time = time.time()
+    article_count = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(search_company, company): company for company in companies}
+        for completed, future in enumerate(as_completed(futures), start=1):
+            company = futures[future]
+            try:
+                articles = future.result()
+                error = None
+            except Exception as e:
+                print(f"Error searching articles for {company['name']}: {e}")
+                articles, error = [], e
+                if state is not None:
+                    state.discard([company["id"]])
+            article_count += len(articles)
+            print(f"[{completed}/{len(companies)}] {company['name']}: {len(articles)} articles")
+            yield company, articles, error
+            if state is not None and error is None:
+                state.commit([company["id"]])
+
+    print(f"Fetched {article_count} articles for {len(companies)} companies in "
+          f"{time.time() - start_time:.1f} seconds using {limiter.spent} tokens.")
+
+
+def search_sector_articles(sector, project_id, date_start, date_end, **kwargs):
+    """Collect iter_sector_articles into a {company_id: articles} dict."""
+    return {company["id"]: articles
+            for company, articles, _ in iter_sector_articles(sector, project_id, date_start, date_end, **kwargs)}
@@ -0,0 +1,142 @@
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import tldextract
+
+
+DEFAULT_CACHE_PATH = "source_uri_cache.sqlite"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_NEGATIVE_TTL_SECONDS = 24 * 3600
+
+
+def extract_domain_root(outlet_domain):
+    """Return the tldextract root of a domain, falling back to the raw domain."""
+    cleaned_domain = str(tldextract.extract(outlet_domain).domain)
+    if not cleaned_domain:
+        print(f"Error extracting domain name from {outlet_domain}")
+        cleaned_domain = outlet_domain
+    return cleaned_domain
+
+
+class SourceUriCache:
+    """
+    Persistent SQLite cache of EventRegistry source URIs keyed by domain root.
+    Unmatched domains are stored with an empty URI and expire after negative_ttl.
+    """
+    def __init__(self,
+                 path=DEFAULT_CACHE_PATH,
+                 ttl=DEFAULT_TTL_SECONDS,
+                 negative_ttl=DEFAULT_NEGATIVE_TTL_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS source_uris (
+                domain_root TEXT PRIMARY KEY,
+                uri TEXT,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def get(self, domain_root, now=None):
+        """
+        Return (found, uri) for a domain root. found is False when the entry is
+        missing or expired; uri is None for a cached negative lookup.
+        """
+        now = time.time() if now is None else now
+        row = self.conn.execute(
+            "SELECT uri, fetched_at FROM source_uris WHERE domain_root = ?",
+            (domain_root,)
+        ).fetchone()
+        if row is None:
+            return False, None
+        uri, fetched_at = row
+        ttl = self.ttl if uri else self.negative_ttl
+        if now - fetched_at > ttl:
+            return False, None
+        return True, uri or None
+
+    def set_many(self, uri_map, now=None):
+        """Store {domain_root: uri or None} in one transaction."""
+        now = time.time() if now is None else now
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO source_uris (domain_root, uri, fetched_at) VALUES (?, ?, ?)",
+            [(domain_root, uri or "", now) for domain_root, uri in uri_map.items()]
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def resolve_source_uris(eventregistry_client, domains, cache=None, max_workers=8):
+    """
+    Resolve EventRegistry source URIs for a list of outlet domains.
+    Domains are deduplicated by tldextract root, cached roots are served locally and
+    only new or expired roots are looked up, concurrently with at most max_workers calls.
+    Returns ({domain: uri}, stats) where unmatched domains are left out of the map.
+    """
+    start_time = time.time()
+    owns_cache = cache is None
+    cache = SourceUriCache() if owns_cache else cache
+
+    try:
+        domain_roots = {domain: extract_domain_root(domain) for domain in domains}
+        unique_roots = set(domain_roots.values())
+
+        root_uris = {}
+        to_fetch = []
+        for domain_root in unique_roots:
+            found, uri = cache.get(domain_root)
+            if found:
+                root_uris[domain_root] = uri
+            else:
+                to_fetch.append(domain_root)
+
+        fetched = {}
+        errors = 0
+        if to_fetch:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {executor.submit(eventregistry_client.getSourceUri, domain_root): domain_root
+                           for domain_root in to_fetch}
+                for future in as_completed(futures):
+                    domain_root = futures[future]
+                    try:
+                        uri = future.result()
+                    except Exception as e:
+                        # errors are not cached so the next refresh retries them
+                        print(f"Error retrieving URI for {domain_root}: {e}")
+                        errors += 1
+                        continue
+                    if not uri:
+                        print(f"Unmatched domain: {domain_root}")
+                    fetched[domain_root] = uri or None
+
+        cache.set_many(fetched)
+        root_uris.update(fetched)
+    finally:
+        # a cache created here is ours to close; a caller's cache stays open for reuse
+        if owns_cache:
+            cache.close()
+
+    uri_map = {domain: root_uris[domain_root]
+               for domain, domain_root in domain_roots.items()
+               if root_uris.get(domain_root)}
+
+    stats = {
+        "domains": len(domain_roots),
+        "unique_roots": len(unique_roots),
+        "cache_hits": len(unique_roots) - len(to_fetch),
+        "cache_misses": len(to_fetch),
+        "unmatched": sum(1 for uri in root_uris.values() if not uri),
+        "errors": errors,
+        "wall_time_seconds": round(time.time() - start_time, 3),
+    }
+    print(f"Resolved {stats['unique_roots']} domain roots: {stats['cache_hits']} cache hits, "
+          f"{stats['cache_misses']} API lookups, {stats['errors']} errors "
+          f"in {stats['wall_time_seconds']} seconds.")
+
+    return uri_map, stats
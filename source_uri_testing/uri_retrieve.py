@@ -7,7 +7,10 @@ from google.cloud import bigquery
 from datetime import datetime, timezone
 import uuid
 import hashlib
-import tldextract
+
+from source_uri_cache import resolve_source_uris
+from article_state import incremental_date_start
+from concepts_catalogue import get_catalogue
 
 
 RETURN_INFO = ReturnInfo(articleInfo = ArticleInfoFlags(basicInfo = True,
@@ -36,6 +39,39 @@ RETURN_INFO = ReturnInfo(articleInfo = ArticleInfoFlags(basicInfo = True,
                                             
                         )
 
+# Named projections of RETURN_INFO, so each stage only downloads the fields it uses
+RETURN_INFO_PROFILES = {
+    "headline-only": ReturnInfo(articleInfo = ArticleInfoFlags(basicInfo = True,
+                                                               title = True,
+                                                               body = False,
+                                                               url = True,
+                                                               eventUri = False,
+                                                               authors = False,
+                                                               image = False,
+                                                               sentiment = False),
+                                sourceInfo = SourceInfoFlags(title = True)),
+    "byte-summarisation": ReturnInfo(articleInfo = ArticleInfoFlags(basicInfo = True,
+                                                                    title = True,
+                                                                    body = True,
+                                                                    url = True,
+                                                                    eventUri = False,
+                                                                    authors = True,
+                                                                    concepts = True,
+                                                                    image = True,
+                                                                    sentiment = False,
+                                                                    dates = True),
+                                     sourceInfo = SourceInfoFlags(title = True,
+                                                                  ranking = True)),
+    "full": RETURN_INFO,
+}
+
+
+def get_return_info(profile="full"):
+    """Return the ReturnInfo for a named projection profile (see RETURN_INFO_PROFILES)."""
+    if profile not in RETURN_INFO_PROFILES:
+        raise ValueError(f"Unknown return info profile '{profile}', expected one of {list(RETURN_INFO_PROFILES)}")
+    return RETURN_INFO_PROFILES[profile]
+
 # TODO: make note to add more AI concepts to this list
 ARTIFICIAL_INTELLIGENCE_CONCEPTS = ["https://en.wikipedia.org/wiki/Artificial_intelligence",
                                     "https://en.wikipedia.org/wiki/Machine_learning",
@@ -55,36 +91,14 @@ ARTIFICIAL_INTELLIGENCE_CONCEPTS = ["https://en.wikipedia.org/wiki/Artificial_in
 
 
 def fetch_company_concepts_list(sector: Literal["Index Bank", "Insurance1000", "Index Insurance", "Payments", "Index1000", "Other"],
-                                project_id):
-    
-    client=bigquery.Client(project=project_id)
-
-    normalised_sector = sector.lower()
-    
-    concept_query = f"""
-        SELECT
-                t1.id,
-                t1.name,
-                t1.additional_names,
-                t1.company_type,
-                t1.internal_classification,
-                t2.url_list
-            FROM
-                `evident-data.taxonomies.bank_metadata` AS t1
-            LEFT JOIN
-                (
-                    SELECT id, ARRAY(SELECT url FROM UNNEST(concept_url) WHERE url IS NOT NULL) AS url_list
-                    FROM `evident-data.staging.company_ids`
-                    WHERE ARRAY_LENGTH(concept_url) > 0
-                    AND EXISTS (SELECT 1 FROM UNNEST(concept_url) WHERE url IS NOT NULL)
-                ) AS t2
-            ON
-                t1.id = t2.id
-            WHERE lower(t1.internal_classification) = "{normalised_sector}"
+                                project_id,
+                                catalogue=None):
     """
-
-    results = client.query(concept_query).result()
-    company_concepts_list = [dict(row) for row in results]
+    Return the company concept rows for a sector from the local concepts catalogue,
+    which is refreshed from BigQuery for all sectors at once when it expires.
+    """
+    catalogue = catalogue or get_catalogue(project_id)
+    company_concepts_list = catalogue.companies(sector)
 
     total_urls = sum(len(row['url_list']) for row in company_concepts_list if row['url_list'])
     print(f"Fetched {total_urls} URLs for {len(company_concepts_list)} companies.")
@@ -100,15 +114,31 @@ def login_eventregistry():
     return EventRegistry(apiKey=api_key)
 
 
-def article_search_and_return_list_of_dicts(search_concepts,
-                                            eventregistry_client,
-                                            date_start,
-                                            date_end,
-                                            company_id,
-                                            sector,
-                                            topic_concepts=ARTIFICIAL_INTELLIGENCE_CONCEPTS,
-                                            return_info=RETURN_INFO,
-                                            ):
+def iter_articles(search_concepts,
+                  eventregistry_client,
+                  date_start,
+                  date_end,
+                  company_id,
+                  sector,
+                  topic_concepts=ARTIFICIAL_INTELLIGENCE_CONCEPTS,
+                  return_info=RETURN_INFO,
+                  state=None,
+                  ):
+    """
+    Generator version of the article search: yields each article as it arrives from
+    EventRegistry with the article_id/company_id/sector/run_datetime/temp_id enrichment added.
+
+    If state (an article_state.ArticleStateStore) is given, the search starts from the company's
+    stored watermark and articles already stored for the company are dropped before enrichment.
+    Call state.commit() once the yielded articles have been written.
+
+    return_info can also be the name of a projection profile from RETURN_INFO_PROFILES.
+    """
+    if isinstance(return_info, str):
+        return_info = get_return_info(return_info)
+
+    if state is not None:
+        date_start = incremental_date_start(state, sector, company_id, date_start)
 
     qStr ={
     "$query": {
@@ -135,26 +165,85 @@ def article_search_and_return_list_of_dicts(search_concepts,
     q= QueryArticlesIter.initWithComplexQuery(qStr)
 
     run_date = datetime.now(timezone.utc).isoformat()
-    
-    all_articles = []
 
     for article in q.execQuery(eventregistry_client,
                                returnInfo = return_info):
 
+        temp_id = hashlib.sha1(f"{article.get('dateTimePub', '')}_{article.get('url', '')}".encode("utf-8")).hexdigest()[:10]
+        if state is not None:
+            if state.check_and_mark(company_id, temp_id):
+                continue
+            state.advance_watermark(sector, company_id, article.get("dateTimePub"))
+
         article["article_id"] = str(uuid.uuid4())
         article["company_id"] = company_id
         article["sector"] = sector
         article["run_datetime"] = run_date 
-        article["temp_id"] = hashlib.sha1(f"{article.get('dateTimePub', '')}_{article.get('url', '')}".encode("utf-8")).hexdigest()[:10]
-        all_articles.append(article)
+        article["temp_id"] = temp_id
+        yield article
+
+
+def article_search_and_return_list_of_dicts(search_concepts,
+                                            eventregistry_client,
+                                            date_start,
+                                            date_end,
+                                            company_id,
+                                            sector,
+                                            topic_concepts=ARTIFICIAL_INTELLIGENCE_CONCEPTS,
+                                            return_info=RETURN_INFO,
+                                            state=None,
+                                            ):
+    """
+    Return every matching article as one list. Prefer iter_articles + stream_articles_to_sink
+    for wide date ranges, as this holds all articles in memory at once.
+    """
+    return list(iter_articles(search_concepts,
+                              eventregistry_client,
+                              date_start,
+                              date_end,
+                              company_id,
+                              sector,
+                              topic_concepts=topic_concepts,
+                              return_info=return_info,
+                              state=state))
+
+
+def stream_articles_to_sink(articles, sink, batch_size=500, state=None):
+    """
+    Write an iterable of articles to a sink (see article_sinks) in fixed-size batches,
+    so at most batch_size articles are held in memory. Returns the number of articles written.
+    If the articles came from an incremental search, pass its state to commit it once the sink has closed.
+    """
+    batch = []
+    total = 0
+    try:
+        with sink:
+            for article in articles:
+                batch.append(article)
+                if len(batch) >= batch_size:
+                    sink.write_batch(batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                sink.write_batch(batch)
+                total += len(batch)
+    except Exception:
+        if state is not None:
+            state.discard()
+        raise
+
+    if state is not None:
+        state.commit()
 
-    return all_articles
+    print(f"Streamed {total} articles to {sink}")
+    return total
 
 
-def refresh_source_uri_tbl_in_bigquery(eventregistry_client, project_id):
+def refresh_source_uri_tbl_in_bigquery(eventregistry_client, project_id, uri_cache=None, max_workers=8):
     """
     Refresh the EventRegistry source URIs for each domain in the BQ table that stores all of the approved media sources we want to use in the byte.
     Adds a 'flag_missing_uri' column: 1 if URI not found, 0 if found.
+    Lookups are cached on disk (see source_uri_cache.SourceUriCache) so only new or expired domains hit the API.
     """
     bq_client = bigquery.Client(project=project_id)
     query = f"""
@@ -177,21 +266,11 @@ def refresh_source_uri_tbl_in_bigquery(eventregistry_client, project_id):
     """
     df = bq_client.query(query).to_dataframe()
 
-    # Get source URIs from EventRegistry   
-    uri_map = {}
-    for outlet_domain in df["domain_name"].dropna().unique():
-            cleaned_domain = str(tldextract.extract(outlet_domain).domain)
-            if not cleaned_domain:
-                print(f"Error extracting domain name from {outlet_domain}")
-                cleaned_domain = outlet_domain
-            try:
-                uri = eventregistry_client.getSourceUri(cleaned_domain)
-                if uri:
-                    uri_map[cleaned_domain] = uri
-                else:
-                    print(f"Unmatched domain: {cleaned_domain}")
-            except Exception as e:
-                print(f"Error retrieving URI for {cleaned_domain}: {e}")
+    # Get source URIs from EventRegistry, only looking up new or expired domains
+    uri_map, _ = resolve_source_uris(eventregistry_client,
+                                     df["domain_name"].dropna().unique(),
+                                     cache=uri_cache,
+                                     max_workers=max_workers)
 
     df["eventregistry_sourceuri"] = df["domain_name"].map(uri_map)
     # Create flag: 1 if URI is missing or None
@@ -205,7 +284,8 @@ def refresh_source_uri_tbl_in_bigquery(eventregistry_client, project_id):
 
     print(f"Successfully refreshed `{project_id}.temporary.lucas_uris_test`")
 
-event_reg_client = login_eventregistry()
-project = 'evident-data-dev'
+if __name__ == "__main__":
+    event_reg_client = login_eventregistry()
+    project = 'evident-data-dev'
 
-uri_test_run = refresh_source_uri_tbl_in_bigquery(event_reg_client, project)
\ No newline at end of file
+    uri_test_run = refresh_source_uri_tbl_in_bigquery(event_reg_client, project)
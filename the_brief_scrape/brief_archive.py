@@ -0,0 +1,92 @@
+import hashlib
+import sqlite3
+import time
+import zlib
+from typing import NamedTuple
+
+
+class ArchivedEdition(NamedTuple):
+    url: str
+    html: str
+    content: str
+    content_hash: str
+    etag: str
+    last_modified: str
+    first_seen: float
+    checked_at: float
+
+
+def content_hash(html):
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+class BriefArchive:
+    """
+    Local SQLite archive of Banking Brief editions: zlib-compressed raw HTML keyed by URL with its
+    content hash, the extracted text and the validators (ETag / Last-Modified) needed for
+    conditional re-requests.
+    """
+    def __init__(self, path="brief_archive.sqlite"):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS editions (
+                url TEXT PRIMARY KEY,
+                html BLOB NOT NULL,
+                content TEXT,
+                content_hash TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                first_seen REAL NOT NULL,
+                checked_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def urls(self):
+        return {row[0] for row in self.conn.execute("SELECT url FROM editions")}
+
+    def recent_urls(self, max_age_days):
+        """Editions first archived within max_age_days, which may still be edited upstream."""
+        cutoff = time.time() - max_age_days * 24 * 3600
+        return {row[0] for row in self.conn.execute("SELECT url FROM editions WHERE first_seen >= ?", (cutoff,))}
+
+    def get(self, url):
+        row = self.conn.execute(
+            "SELECT url, html, content, content_hash, etag, last_modified, first_seen, checked_at "
+            "FROM editions WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        return ArchivedEdition(row[0], zlib.decompress(row[1]).decode("utf-8"), *row[2:])
+
+    def conditional_headers(self, url):
+        row = self.conn.execute("SELECT etag, last_modified FROM editions WHERE url = ?", (url,)).fetchone()
+        headers = {}
+        if row and row[0]:
+            headers["If-None-Match"] = row[0]
+        if row and row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def put(self, url, html, content, etag=None, last_modified=None):
+        """Store an edition; returns True if it is new or its HTML changed."""
+        new_hash = content_hash(html)
+        now = time.time()
+        row = self.conn.execute("SELECT content_hash, first_seen FROM editions WHERE url = ?", (url,)).fetchone()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO editions (url, html, content, content_hash, etag, last_modified, first_seen, checked_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, zlib.compress(html.encode("utf-8"), 9), content, new_hash, etag, last_modified,
+             row[1] if row else now, now)
+        )
+        self.conn.commit()
+        return row is None or row[0] != new_hash
+
+    def touch(self, url):
+        """Record a 304 revalidation."""
+        self.conn.execute("UPDATE editions SET checked_at = ? WHERE url = ?", (time.time(), url))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
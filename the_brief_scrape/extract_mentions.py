@@ -2,36 +2,26 @@ import pandas as pd
 from google.cloud import bigquery
 
 from get_brief_articles import run_scrape
-
-articles_df = run_scrape()
+from mention_engine import MentionIndex, load_company_aliases
 
 project = 'evident-data-dev'
 
-bq_client = bigquery.Client(project=project)
-
-sql ='''
-SELECT
-  t.company,
-  li.linkedin_organisation AS possible_names
-FROM
-  `evident-data-dev.curated_taxonomies.company_ids` AS t
-CROSS JOIN
-  UNNEST(t.linkedin_id) AS li
-WHERE sector = 'bank'
-'''
+def add_company_mentions(articles_df, index, processes=None):
+    """Companies mentioned in each article, matched on whole words in one pass per article."""
+    articles_df["banks_mentioned"] = index.entities_many(articles_df["content"].fillna("").tolist(),
+                                                         processes=processes)
+    return articles_df
 
-bq_df = bq_client.query(sql.format('bank')).to_dataframe()
-bank_names_dict = bq_df.groupby('company')['possible_names'].apply(list).to_dict()
+def main(sector='bank', processes=None):
+    articles_df = run_scrape()
 
-def company_mentions(text):
-    mentions = []
-    for company, possible_names in bank_names_dict.items():
-        for name in possible_names:
-            if name and name in text:
-                mentions.append(company)
-                break
-    return mentions if mentions else []
+    bq_client = bigquery.Client(project=project)
+    bank_names_dict = load_company_aliases(bq_client, sector)
+    index = MentionIndex(bank_names_dict)
 
-articles_df["banks_mentioned"] = articles_df["content"].apply(company_mentions)
+    articles_df = add_company_mentions(articles_df, index, processes=processes)
+    articles_df.to_excel("articles_with_mentions.xlsx")
+    return articles_df
 
-articles_df.to_excel("articles_with_mentions.xlsx")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
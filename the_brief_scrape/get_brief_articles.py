@@ -1,60 +1,170 @@
+import argparse
 import asyncio
+import random
+from urllib.parse import urljoin
+
 import httpx
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import pandas as pd
 
+from brief_archive import BriefArchive
+
 base_url = "https://evidentinsights.com"
 sub_section = "/bankingbrief/"
 
-def get_article_links():
-    page_html = httpx.get(base_url+sub_section).text
-    soup = BeautifulSoup(page_html, "html.parser")
+ARCHIVE_PATH = "brief_archive.sqlite"
+INDEX_LINK_CLASS = "text-black transition-colors no-underline"
+UNWANTED_IDS = ("whats-on-at-evident", "about-evident")
+# sections whose heading contains any of these are dropped
+UNWANTED_H2 = ("THE BRIEF TEAM",)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# guard against a pagination loop the seen-page check does not catch (e.g. ever-changing query strings)
+MAX_INDEX_PAGES = 500
+
+# only the story sections of an edition are parsed
+SECTIONS_STRAINER = SoupStrainer(class_="nws-container")
+INDEX_STRAINER = SoupStrainer("a")
+
+def parse_index_page(page_html, page_url):
+    """Edition links on one index page, and the URL of the next (older) page if there is one."""
+    soup = BeautifulSoup(page_html, "html.parser", parse_only=INDEX_STRAINER)
 
     article_links = [article.get('href') for article in
-                     soup.find_all(class_ = "text-black transition-colors no-underline")
+                     soup.find_all(class_ = INDEX_LINK_CLASS)
                      if article.get('href')]
-    return article_links
 
-async def fetch_article_text(client, url_section):
-    html_response = await client.get(base_url + url_section)
-    soup = BeautifulSoup(html_response.text, "html.parser")
-    story_sections = soup.find_all(class_ = "nws-container")
+    next_page = soup.find("a", rel="next") or soup.find(
+        "a", string=lambda text: text and text.strip().lower() in ("next", "older", "next page", "older editions", "›", "»")
+    )
+    next_url = urljoin(page_url, next_page["href"]) if next_page and next_page.get("href") else None
+    return article_links, next_url
 
-    unwanted_id = ("whats-on-at-evident", "about-evident") 
-    unwanted_h2 = ("THE BRIEF TEAM")
+def extract_article_text(page_html):
+    story_sections = BeautifulSoup(page_html, "html.parser", parse_only=SECTIONS_STRAINER).find_all(class_ = "nws-container")
 
     filtered_sections = []
     for section in story_sections:
-        if section.get('id') in unwanted_id:
+        if section.get('id') in UNWANTED_IDS:
             continue
-        
+
         h2_tag = section.find('h2')
-        if h2_tag and h2_tag.text.strip() in unwanted_h2:
+        if h2_tag and any(unwanted in h2_tag.text for unwanted in UNWANTED_H2):
             continue
-        
+
         filtered_sections.append(section.get_text(strip=True, separator=' '))
-    
+
     return " ".join(filtered_sections)
 
-async def main(links):
-    semaphore = asyncio.Semaphore(10)
+async def fetch(client, url, headers=None, max_retries=4):
+    """GET with retries and jittered backoff on 429/5xx and transport errors."""
+    for attempt in range(max_retries + 1):
+        try:
+            response = await client.get(url, headers=headers)
+            if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+                return response
+            retry_after = response.headers.get("Retry-After")
+            delay = float(retry_after) if retry_after and retry_after.isdigit() else random.uniform(0, 2 ** attempt)
+        except httpx.TransportError:
+            if attempt == max_retries:
+                raise
+            delay = random.uniform(0, 2 ** attempt)
+        await asyncio.sleep(delay)
 
-    async def fetch_with_semaphore(client, link):
-        async with semaphore:
-            return await fetch_article_text(client, link)
+async def crawl_index(client, archive, backfill=False, max_pages=MAX_INDEX_PAGES):
+    """
+    Walk the index pages newest first and return every edition link seen. Unless backfilling,
+    the walk stops at the first page whose editions are all archived already, so a routine
+    re-run costs one index request. A "next" link back to a page already visited ends the walk,
+    as does reaching max_pages.
+    """
+    archived = archive.urls()
+    page_url = base_url + sub_section
+    links, seen_links, seen_pages = [], set(), set()
+    while page_url and (max_pages is None or len(seen_pages) < max_pages):
+        if page_url in seen_pages:
+            print(f"Index page {page_url} already visited, stopping")
+            break
+        seen_pages.add(page_url)
+        response = await fetch(client, page_url)
+        response.raise_for_status()
+        page_links, page_url = parse_index_page(response.text, page_url)
+        new_links = [link for link in dict.fromkeys(page_links) if link not in seen_links]
+        seen_links.update(new_links)
+        links.extend(new_links)
+        if not backfill and all(urljoin(base_url, link) in archived for link in new_links):
+            break
+    if page_url and max_pages is not None and len(seen_pages) >= max_pages:
+        print(f"Stopped after max_pages={max_pages} index pages")
+    print(f"Crawled {len(seen_pages)} index page(s), {len(links)} editions")
+    return links
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
+async def sync_edition(client, archive, link, revalidate):
+    """Fetch an edition that is not archived yet, or revalidate a recent one. Returns the fetch status."""
+    url = urljoin(base_url, link)
+    headers = archive.conditional_headers(url) if revalidate else None
+    response = await fetch(client, url, headers=headers)
+    if response.status_code == 304:
+        archive.touch(url)
+        return "not modified"
+    response.raise_for_status()
+    changed = archive.put(url, response.text, extract_article_text(response.text),
+                          etag=response.headers.get("ETag"),
+                          last_modified=response.headers.get("Last-Modified"))
+    return "changed" if changed else "unchanged"
 
-        tasks = [fetch_with_semaphore(client, link) for link in links]
-        results = await asyncio.gather(*tasks)
-        
-        combined_data = dict(zip(links, results))
+async def main(links=None, archive_path=ARCHIVE_PATH, backfill=False, revalidate_days=2, max_connections=10):
+    """
+    Crawl the index (unless links are given), fetch editions missing from the archive, revalidate
+    editions first seen within revalidate_days and return {link: content} from the archive.
+    """
+    archive = BriefArchive(archive_path)
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    try:
+        # one pooled client for the index and every edition
+        async with httpx.AsyncClient(timeout=30.0, limits=limits, follow_redirects=True) as client:
+            if links is None:
+                links = await crawl_index(client, archive, backfill=backfill)
+
+            archived = archive.urls()
+            recent = archive.recent_urls(revalidate_days)
+            to_sync = [(link, urljoin(base_url, link) in recent) for link in links
+                       if urljoin(base_url, link) not in archived or urljoin(base_url, link) in recent]
+
+            semaphore = asyncio.Semaphore(max_connections)
+
+            async def sync_with_semaphore(link, revalidate):
+                async with semaphore:
+                    return await sync_edition(client, archive, link, revalidate)
+
+            results = await asyncio.gather(*[sync_with_semaphore(link, revalidate) for link, revalidate in to_sync],
+                                           return_exceptions=True)
+            statuses = {}
+            for (link, _), result in zip(to_sync, results):
+                if isinstance(result, Exception):
+                    print(f"Failed to fetch {link}: {result}")
+                    result = "failed"
+                statuses[result] = statuses.get(result, 0) + 1
+            print(f"{len(links) - len(to_sync)} editions served from the archive, fetched {len(to_sync)}: {statuses}")
+
+        combined_data = {}
+        for link in links:
+            edition = archive.get(urljoin(base_url, link))
+            if edition is not None:
+                combined_data[link] = edition.content
         return combined_data
+    finally:
+        archive.close()
 
-def run_scrape():
-    article_links = get_article_links()
-    fetched_articles_map = asyncio.run(main(article_links))
+def run_scrape(archive_path=ARCHIVE_PATH, backfill=False, revalidate_days=2):
+    fetched_articles_map = asyncio.run(main(archive_path=archive_path, backfill=backfill, revalidate_days=revalidate_days))
     return pd.DataFrame(fetched_articles_map.items(), columns=['link', 'content'])
 
 if __name__ == "__main__":
-    articles_df = run_scrape()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Sync the Banking Brief editions into the local archive.")
+    parser.add_argument("--backfill", action="store_true", help="walk every index page, not just the new ones")
+    parser.add_argument("--archive", default=ARCHIVE_PATH, help="SQLite archive of fetched editions")
+    parser.add_argument("--revalidate-days", type=int, default=2,
+                        help="re-request editions first seen within this many days")
+    args = parser.parse_args()
+
+    articles_df = run_scrape(archive_path=args.archive, backfill=args.backfill, revalidate_days=args.revalidate_days)
@@ -0,0 +1,180 @@
+"""
+Entity mention matching over many aliases in one pass (Aho-Corasick).
+
+Aliases are compiled once into an automaton; each text is then scanned once regardless of how
+many aliases there are. Matches respect word boundaries (so "ING" does not match inside
+"banking") and are case-sensitive, so the banks "Ally", "Regions" or "Discover" do not match the
+ordinary words; aliases listed in case_insensitive also match in any case.
+
+    index = MentionIndex({"ING Group": ["ING", "ING Bank"], "HSBC": ["HSBC"]})
+    index.find("HSBC and ING Bank ...")   # [Mention(entity='HSBC', alias='HSBC', start=0, end=4), ...]
+    index.entities_many(texts, processes=4)
+"""
+from collections import deque
+from multiprocessing import Pool
+from typing import NamedTuple
+
+
+COMPANY_ALIASES_QUERY = '''
+SELECT
+  t.company,
+  li.linkedin_organisation AS possible_names
+FROM
+  `evident-data-dev.curated_taxonomies.company_ids` AS t
+CROSS JOIN
+  UNNEST(t.linkedin_id) AS li
+WHERE sector = @sector
+'''
+
+
+class Mention(NamedTuple):
+    entity: str
+    alias: str
+    start: int
+    end: int
+
+
+def is_word_char(char):
+    return char.isalnum() or char == "_"
+
+
+def lower_same_length(text):
+    """text.lower(), keeping offsets valid for the few characters whose lowercase is longer."""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(char.lower() if len(char.lower()) == 1 else char for char in text)
+
+
+class MentionIndex:
+    """
+    Aho-Corasick automaton over the aliases of many entities.
+    aliases maps entity -> iterable of alias strings; empty aliases and those shorter than
+    min_alias_length are ignored. Aliases match exactly, except those in case_insensitive
+    (e.g. {"Banco Santander"} to also catch "BANCO SANTANDER" in headlines).
+    """
+    def __init__(self, aliases, case_insensitive=(), min_alias_length=2):
+        case_insensitive = set(case_insensitive)
+        # one pattern per distinct (entity, alias)
+        self.patterns = []
+        seen = set()
+        for entity, entity_aliases in aliases.items():
+            for alias in entity_aliases:
+                alias = alias.strip() if isinstance(alias, str) else ""
+                if len(alias) < min_alias_length or (entity, alias) in seen:
+                    continue
+                seen.add((entity, alias))
+                self.patterns.append((entity, alias, alias not in case_insensitive))
+        self.build()
+
+    def build(self):
+        # goto[state] maps a character to the next state, outputs[state] lists pattern ids ending there
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [[]]
+        for pattern_id, (_, alias, _) in enumerate(self.patterns):
+            state = 0
+            for char in lower_same_length(alias):
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.outputs.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.outputs[state].append(pattern_id)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fail_state = self.fail[state]
+                while fail_state and char not in self.goto[fail_state]:
+                    fail_state = self.fail[fail_state]
+                self.fail[next_state] = self.goto[fail_state].get(char, 0)
+                self.outputs[next_state] = self.outputs[next_state] + self.outputs[self.fail[next_state]]
+
+    def find(self, text, overlapping=False):
+        """
+        Mentions in text with character offsets. By default overlapping matches of the same entity
+        are resolved leftmost-longest, so "ING Bank" wins over the "ING" inside it. Overlaps between
+        different entities are all kept, so an alias shared by two companies reports both.
+        """
+        if not isinstance(text, str) or not text:
+            return []
+        lowered = lower_same_length(text)
+        goto, fail, outputs, patterns = self.goto, self.fail, self.outputs, self.patterns
+        matches = []
+        state = 0
+        for position, char in enumerate(lowered):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_id in outputs[state]:
+                entity, alias, case_sensitive = patterns[pattern_id]
+                end = position + 1
+                start = end - len(alias)
+                if case_sensitive and text[start:end] != alias:
+                    continue
+                if is_word_char(alias[0]) and start > 0 and is_word_char(text[start - 1]):
+                    continue
+                if is_word_char(alias[-1]) and end < len(text) and is_word_char(text[end]):
+                    continue
+                matches.append(Mention(entity, alias, start, end))
+
+        matches.sort(key=lambda mention: (mention.start, mention.start - mention.end))
+        if overlapping:
+            return matches
+        resolved, last_end = [], {}
+        for mention in matches:
+            if mention.start >= last_end.get(mention.entity, 0):
+                resolved.append(mention)
+                last_end[mention.entity] = mention.end
+        return resolved
+
+    def entities(self, text):
+        """Distinct entities mentioned in text, in order of first mention."""
+        return list(dict.fromkeys(mention.entity for mention in self.find(text)))
+
+    def find_many(self, texts, processes=None, chunksize=64):
+        """find() over many texts, spread over a process pool when processes > 1."""
+        return self._map("find", texts, processes, chunksize)
+
+    def entities_many(self, texts, processes=None, chunksize=64):
+        return self._map("entities", texts, processes, chunksize)
+
+    def _map(self, method, texts, processes, chunksize):
+        texts = list(texts)
+        if not processes or processes <= 1 or len(texts) < 2 * chunksize:
+            return [getattr(self, method)(text) for text in texts]
+        # the index is pickled once per worker rather than once per task
+        with Pool(processes, initializer=_init_worker, initargs=(self,)) as pool:
+            return pool.map(_worker_functions[method], texts, chunksize=chunksize)
+
+
+_worker_index = None
+
+
+def _init_worker(index):
+    global _worker_index
+    _worker_index = index
+
+
+def _find_in_worker(text):
+    return _worker_index.find(text)
+
+
+def _entities_in_worker(text):
+    return _worker_index.entities(text)
+
+
+_worker_functions = {"find": _find_in_worker, "entities": _entities_in_worker}
+
+
+def load_company_aliases(bq_client, sector="bank"):
+    """{company: [aliases]} from curated_taxonomies.company_ids (LinkedIn organisation names)."""
+    from google.cloud import bigquery
+
+    job_config = bigquery.QueryJobConfig(query_parameters=[bigquery.ScalarQueryParameter("sector", "STRING", sector)])
+    aliases_df = bq_client.query(COMPANY_ALIASES_QUERY, job_config=job_config).to_dataframe()
+    return aliases_df.groupby("company")["possible_names"].apply(list).to_dict()
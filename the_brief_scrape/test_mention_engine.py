@@ -0,0 +1,37 @@
+from mention_engine import MentionIndex
+
+
+COMMON_WORD_BANKS = {
+    "Ally Financial": ["Ally"],
+    "Regions Financial": ["Regions"],
+    "Discover Financial": ["Discover"],
+    "JPMorgan Chase": ["Chase", "JPMorgan"],
+    "Citizens Financial": ["Citizens"],
+}
+
+
+def test_common_words_are_not_bank_mentions():
+    index = MentionIndex(COMMON_WORD_BANKS)
+    text = ("An ally of the minister said regions across the country could discover new ways "
+            "to chase growth, and citizens would benefit.")
+    assert index.entities(text) == []
+
+
+def test_capitalised_bank_names_are_mentions():
+    index = MentionIndex(COMMON_WORD_BANKS)
+    text = "Ally and Regions reported results; Discover, Chase and Citizens follow next week."
+    assert index.entities(text) == ["Ally Financial", "Regions Financial", "Discover Financial",
+                                    "JPMorgan Chase", "Citizens Financial"]
+
+
+def test_case_insensitive_opt_in():
+    index = MentionIndex({"Banco Santander": ["Banco Santander"], "ING Group": ["ING"]},
+                         case_insensitive={"Banco Santander"})
+    assert index.entities("BANCO SANTANDER and banco santander") == ["Banco Santander"]
+    assert index.entities("Ing said nothing about banking") == []
+
+
+def test_longest_alias_wins_within_an_entity():
+    index = MentionIndex({"ING Group": ["ING", "ING Bank"], "HSBC": ["HSBC"]})
+    mentions = index.find("HSBC and ING Bank")
+    assert [(mention.entity, mention.alias) for mention in mentions] == [("HSBC", "HSBC"), ("ING Group", "ING Bank")]